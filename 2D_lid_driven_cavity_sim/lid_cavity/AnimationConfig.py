@@ -9,14 +9,29 @@ from lid_cavity.GridConstr import GridConstr
 
 
 class AnimationConfig: 
+    """
+    Settings of the animations of a simulation result.
+
+    Attributes:
+    -----------
+        frame_skip (int): Number of time steps between two frames.
+        snapshot_skip (int): Number of saved snapshots between two frames, frame_skip converted with
+                             the save schedule of the run (save_every or save_interval), at least 1.
+        downsample (int): Stride of the velocity arrows.
+        interval (int): Delay between frames in milliseconds.
+    """
 
     def __init__(self, config: SimulConfig,  grid: GridConstr,  export_dir, frame_skip=50, downsample=2, interval=50):
             
             self.animation_time = config.T
+            self.T = config.T
             self.dt = config.dt
             self.nt = config.nt
 
             self.frame_skip = frame_skip
+            # The result holds one snapshot every steps_per_snapshot time steps
+            steps_per_snapshot = config.save_every if config.save_interval is None else config.save_interval / config.dt
+            self.snapshot_skip = max(1, int(round(frame_skip / steps_per_snapshot)))
             self.downsample = downsample
             self.interval = interval
 
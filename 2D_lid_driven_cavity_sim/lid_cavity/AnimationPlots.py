@@ -1,12 +1,12 @@
 import os
 from matplotlib.animation import FuncAnimation, FFMpegWriter
 import numpy as np
-import matplotlib.pyplot as plt
 
 from mpl_toolkits.mplot3d import Axes3D
 
 from lid_cavity.SimulResult import SimulResult
 from lid_cavity.AnimationConfig import AnimationConfig
+from lid_cavity.FrameRenderer import FrameArtist, FrameRenderer, pressure_range
 
 
 class Animation:
@@ -15,13 +15,13 @@ class Animation:
         self.export_dir = config.export_dir
         self.animation_time = config.T
 
-        self.frame_skip = config.frame_skip
+        self.snapshot_skip = config.snapshot_skip
         self.downsample = config.downsample
         self.interval = config.interval
 
         # Extrac Grid configuration 
         self.grid_x = config.grid_x
-        self.gird_y = config.grid_y  
+        self.grid_y = config.grid_y  
         self.Lx = config.Lx
         self.Ly = config.Ly
         self.nt = config.nt
@@ -29,80 +29,54 @@ class Animation:
         self.T = config.T
 
         # Extract simulation results
+        self.config = config
+        self.result = result
         self.u = result.u
         self.v = result.v
         self.pressure = result.pressure
         self.curl = result.curl
         self.speed = result.speed
+        self.times = result.times
 
 
-    def plot_streamlines(self, filename = "streamlines.mp4"):
+    def plot_streamlines(self, filename = "streamlines.mp4", workers = None):
 
         """
         Save animation of streamlines of the velocity field and pressure fields as an .mp4 video in a specific folder.
+        With workers, the frames are rendered in parallel by FrameRenderer (the result must be opened from a result store).
         """
+        return self.render("streamlines", filename, workers)
 
-        # Ensure output directory exists
-        os.makedirs(self.export_dir, exist_ok=True)
-
-        # Full path to save the animation
-        save_path = os.path.join(self.export_dir, filename)
-
-        fig, ax = plt.subplots(figsize=(6, 6))
-
-        def frame_func(u_k, v_k, p_k, k):
-            ax.clear()
-            contour = ax.contourf(self.grid_x[::self.downsample, ::self.downsample], self.grid_y[::self.downsample, ::self.downsample], p_k[::self.downsample, ::self.downsample], levels = 50, cmap='viridis')
-            ax.colorbar()
-            ax.streamplot(self.grid_x[::self.downsample, ::self.downsample], self.grid_y[::self.downsample, ::self.downsample], u_k[::self.downsample, ::self.downsample], v_k[::self.downsample, ::self.downsample], density=1.5, arrowsize=1, color="tab:cyan")
-            ax.set_xlim((0, self.Lx))
-            ax.set_ylim((0, self.Ly))
-            ax.set_title(f"Velocity and Pressure Field at t = {k * self.dt:.2f}")
-            return contour
-
-        def animate(k):
-            frame_func(self.u[k+1], self.v[k+1], self.p[k], k)
-
-        anim = FuncAnimation(fig, animate, interval = self.interval , frames = range(0, self.nt, self.frame_skip), repeat=False)
-
-        writer = FFMpegWriter(fps=15, metadata=dict(artist='Your Name'), bitrate = 1800)
-        anim.save(save_path, writer=writer)
-
-    def plot_velocity(self, filename = "velocity_field.mp4"):
+    def plot_velocity(self, filename = "velocity_field.mp4", workers = None):
 
         """
         Save animation of velocity and pressure fields as an .mp4 video in a specific folder.
+        With workers, the frames are rendered in parallel by FrameRenderer (the result must be opened from a result store).
         """
+        return self.render("velocity", filename, workers)
 
+    def render(self, kind, filename, workers=None):
         # Ensure output directory exists
         os.makedirs(self.export_dir, exist_ok=True)
 
+        if workers is not None:
+            if self.result.path is None:
+                raise ValueError("Parallel rendering needs a result opened from a result store (ResultStore.DirectorySink).")
+            return FrameRenderer(self.result.path, self.config, max_workers=workers).render(kind, filename)
+
         # Full path to save the animation
         save_path = os.path.join(self.export_dir, filename)
 
-        fig, ax = plt.subplots(figsize=(6, 6))
-
-        def frame_func(u_k, v_k, p_k, k):
-            ax.clear()
-            contour = ax.contourf(self.grid_x[::self.downsample, ::self.downsample], self.grid_y[::self.downsample, ::self.downsample], p_k[::self.downsample, ::self.downsample], levels = 50, cmap='viridis')
-            ax.colorbar()
-            ax.quiver(self.grid_x[::self.downsample, ::self.downsample], self.grid_y[::self.downsample, ::self.downsample], u_k[::self.downsample, ::self.downsample], v_k[::self.downsample, ::self.downsample], arrowsize=1, color='black')
-            ax.set_xlim((0, self.Lx))
-            ax.set_ylim((0, self.Ly))
-            ax.set_title(f"Velocity and Pressure Field at t = {k * self.dt:.2f}")
-            return contour
+        frames = range(0, len(self.u), self.snapshot_skip)
+        p_min, p_max = pressure_range(self.pressure, frames)
+        artist = FrameArtist(kind, self.grid_x, self.grid_y, self.Lx, self.Ly, self.downsample, p_min, p_max)
 
         def animate(k):
-            frame_func(self.u[k+1], self.v[k+1], self.p[k], k)
+            return artist.draw(self.u[k], self.v[k], self.pressure[k], self.times[k])
 
-        anim = FuncAnimation(fig, animate, interval=self.interval , frames = range(0, self.nt, self.frame_skip), repeat=False)
+        anim = FuncAnimation(artist.fig, animate, interval = self.interval , frames = frames, repeat=False)
 
         writer = FFMpegWriter(fps=15, metadata=dict(artist='Your Name'), bitrate = 1800)
-        anim.save(save_path, writer=writer)        
-
-
-
-
-
-
-
+        anim.save(save_path, writer=writer)
+        artist.close()
+        return save_path
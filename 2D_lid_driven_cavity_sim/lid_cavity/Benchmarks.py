@@ -0,0 +1,300 @@
+"""
+Benchmark suite of the lid-driven cavity solver.
+
+Times the stencil operators, the pressure solvers and complete time steps over a range of grid
+sizes, and reports time per call, grid cells updated per second, peak memory (tracemalloc, which
+tracks the NumPy allocations) and, for the time steps, the share of the pressure solve. The
+results are written as JSON and can be compared against a stored baseline to flag regressions:
+
+    python -m lid_cavity.Benchmarks --sizes 32 64 128 --output bench.json
+    python -m lid_cavity.Benchmarks --sizes 32 64 128 --baseline bench.json
+
+precision_check (--precision) compares the single precision modes (SimulConfig dtype and
+pressure_dtype) with the float64 path. For the Re = 100 cavity up to T = 2 with the spectral
+pressure solver, the maximal deviations relative to the float64 fields were
+
+    n     dtype / pressure_dtype    u        v        pressure   state memory   time/step
+    64    float32                   6.2e-08  1.1e-07  1.6e-07    0.52x          0.76x
+    64    float32 / float64         6.5e-08  1.1e-07  1.0e-07    0.67x          0.90x
+    256   float32                   2.9e-07  4.3e-07  3.9e-07    0.50x          0.70x
+    256   float32 / float64         3.0e-07  4.4e-07  2.2e-07    0.67x          0.73x
+
+i.e. round-off of single precision, far below the discretisation error. The float64 pressure
+accumulator mainly helps iterative pressure solves with tight tolerances, whose residual stalls
+near the single precision round-off otherwise.
+
+factor_cache_check (--factor-cache) times the setup of the sparse direct pressure solver with
+and without its on-disk factorisation cache (SimulConfig.pressure_cache_dir) and fails if loading
+the stored factors is not faster than factorising:
+
+    n     factorise   load     solve (SuperLU)   solve (loaded factors)
+    256   0.42 s      0.04 s   9 ms              13 ms
+    512   2.90 s      0.19 s   48 ms             67 ms
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import lid_cavity.diff_operators as diff
+from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+import lid_cavity.PoissonSolvers as poisson
+from lid_cavity.PoissonSolvers import make_pressure_solver
+
+SIZES = (32, 64, 128, 256, 512)
+PRESSURE_SOLVERS = ("jacobi", "multigrid", "spectral", "sparse")
+
+
+def make_config(n, **options):
+    # Unit cavity with n x n cells, Re = 100 and a time step within the explicit stability limits
+    h = 1.0 / n
+    nu = 0.01
+    dt = min(0.2 * h**2 / nu, 0.5 * h)
+    return SimulConfig(1.0, 1.0, h, dt, 100 * dt, 1.0, nu, lambda t: 1.0, verbose=False, **options)
+
+
+def time_call(func, repeat):
+    """
+    Median wall time of func() over `repeat` calls after one warm-up call, and the peak memory
+    allocated during one call.
+    """
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.median(times)), peak
+
+
+def flow_state(grid):
+    # Smooth divergence-free velocity field (single vortex) as input of the operators
+    X, Y = grid.grid_x, grid.grid_y
+    u = np.sin(np.pi * X) * np.cos(np.pi * Y)
+    v = -np.cos(np.pi * X) * np.sin(np.pi * Y)
+    return u, v
+
+
+def bench_stencils(n, repeat):
+    config = make_config(n)
+    grid = GridConstr(config)
+    h = grid.h
+    u, v = flow_state(grid)
+    work = diff.Workspace()
+    out = np.zeros_like(u)
+    u_out, v_out = np.zeros_like(u), np.zeros_like(v)
+    kernels = dict(laplace = lambda: diff.laplace(u, h, out=out),
+                   divergence = lambda: diff.divergence((u, v), h, out=out, work=work),
+                   advection_diffusion = lambda: diff.advection_diffusion(u, v, config.nu, config.dt, h, u_out, v_out, work))
+    for name, func in kernels.items():
+        seconds, peak = time_call(func, repeat)
+        yield dict(benchmark = f"stencil.{name}", n = n, options = {}, seconds = seconds, peak_memory = peak)
+
+
+def bench_pressure(n, repeat, solvers):
+    for solver in solvers:
+        config = make_config(n, pressure_solver=solver)
+        grid = GridConstr(config)
+        u, v = flow_state(grid)
+        rhs = diff.divergence((u, v), grid.h) / config.dt
+        poisson_solver = make_pressure_solver(config, grid)
+        seconds, peak = time_call(lambda: poisson_solver.solve(rhs), repeat)
+        yield dict(benchmark = "pressure_solve", n = n, options = dict(pressure_solver = solver), seconds = seconds,
+                   peak_memory = peak, iterations = poisson_solver.last_iterations, residual = poisson_solver.last_residual)
+
+
+def bench_steps(n, steps, options_list):
+    for options in options_list:
+        config = make_config(n, **options)
+        grid = GridConstr(config)
+        sim = LidDrivenCavity(config, grid)
+        sim.u, sim.v = sim.apply_boundary_conditions(sim.u, sim.v, sim.lid_velocity(0))
+
+        # Time the pressure solves inside the steps
+        solve = sim.poisson_solver.solve
+        pressure_time = [0.0]
+        def timed_solve(rhs, p0=None):
+            start = time.perf_counter()
+            p = solve(rhs, p0)
+            pressure_time[0] += time.perf_counter() - start
+            return p
+        sim.poisson_solver.solve = timed_solve
+
+        # Warm-up step (e.g. Numba compilation, factorisations)
+        sim.step(0, config.dt)
+        pressure_time[0] = 0.0
+        start = time.perf_counter()
+        for k in range(1, steps + 1):
+            sim.step(k, config.dt)
+        seconds = (time.perf_counter() - start) / steps
+        share = pressure_time[0] / (seconds * steps)
+
+        tracemalloc.start()
+        sim.step(steps + 1, config.dt)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        yield dict(benchmark = "step", n = n, options = options, seconds = seconds, peak_memory = peak, pressure_share = share)
+
+
+def precision_check(n=64, T=2.0, pressure_solver="spectral"):
+    """
+    Accuracy of the single precision modes against the float64 path: the cavity of make_config
+    with n x n cells is run up to time T with dtype="float32", with and without a float64 pressure
+    solve, and compared with the float64 run. Returns one dict per mode with the maximal deviation
+    of u, v and pressure relative to the maximum of the float64 field, the time per step and the
+    memory of the working state.
+    """
+    def run(options):
+        config = make_config(n, pressure_solver=pressure_solver, pressure_warm_start=False, save_every=10**9, **options)
+        config.T, config.nt = T, int(T / config.dt)
+        sim = LidDrivenCavity(config, GridConstr(config))
+        start = time.perf_counter()
+        sim.run()
+        seconds = (time.perf_counter() - start) / config.nt
+        state_bytes = sum(getattr(sim, name).nbytes for name in ("u", "v", "u_star", "v_star", "pressure", "rhs"))
+        return sim, seconds, state_bytes
+
+    reference, _, _ = run({})
+    modes = [dict(dtype = "float64"), dict(dtype = "float32"), dict(dtype = "float32", pressure_dtype = "float64")]
+    results = []
+    for options in modes:
+        sim, seconds, state_bytes = run(options)
+        deviations = {name: float(np.max(np.abs(getattr(sim, name) - getattr(reference, name))) / np.max(np.abs(getattr(reference, name))))
+                      for name in ("u", "v", "pressure")}
+        results.append(dict(options = options, n = n, T = T, seconds = seconds, state_bytes = state_bytes, deviation = deviations))
+    return results
+
+
+def factor_cache_check(n=256, repeat=5, max_ratio=0.5):
+    """
+    Setup and solve time of the sparse direct pressure solver with the on-disk factorisation
+    cache: the first solver factorises and stores the factors, the second one loads them. Raises
+    an AssertionError if loading takes more than max_ratio times the factorisation.
+    """
+    h = 1.0 / n
+    rhs = np.random.default_rng(0).standard_normal((n + 1, n + 1))
+    times = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in ("factorise", "load"):
+            poisson._factor_cache.pop(poisson.pressure_factor_key(n, n, h), None)
+            start = time.perf_counter()
+            solver = poisson.SparseDirectSolver(n, n, h, cache_dir=cache_dir)
+            times[name] = time.perf_counter() - start
+            times[f"solve_{name}"], _ = time_call(lambda: solver.solve(rhs), repeat)
+    poisson._factor_cache.pop(poisson.pressure_factor_key(n, n, h), None)
+    assert times["load"] <= max_ratio * times["factorise"], \
+        f"Loading the cached factors ({times['load']:.3f} s) is not faster than factorising ({times['factorise']:.3f} s)."
+    return dict(n = n, **times)
+
+
+def run_benchmarks(sizes=SIZES, solvers=PRESSURE_SOLVERS, step_options=None, repeat=5, steps=10):
+    """
+    Run the benchmark suite and return the report as a dict. step_options is the list of
+    SimulConfig options of the time step benchmarks (default: every pressure solver).
+    """
+    if step_options is None:
+        step_options = [dict(pressure_solver = solver) for solver in solvers]
+    results = []
+    for n in sizes:
+        results += bench_stencils(n, repeat)
+        results += bench_pressure(n, repeat, solvers)
+        results += bench_steps(n, steps, step_options)
+    for result in results:
+        result["cells_per_second"] = result["n"]**2 / result["seconds"]
+    return dict(machine = dict(platform = platform.platform(), processor = platform.processor(),
+                               python = platform.python_version(), numpy = np.__version__),
+                results = results)
+
+
+def _key(result):
+    return (result["benchmark"], result["n"], json.dumps(result["options"], sort_keys=True))
+
+
+def compare(report, baseline, threshold=1.2):
+    """
+    Benchmarks of report which are slower than in baseline by more than the factor threshold.
+    Returns a list of (benchmark, n, options, baseline seconds, seconds, ratio).
+    """
+    baseline_results = {_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        reference = baseline_results.get(_key(result))
+        if reference is None:
+            continue
+        ratio = result["seconds"] / reference["seconds"]
+        if ratio > threshold:
+            regressions.append((result["benchmark"], result["n"], result["options"], reference["seconds"], result["seconds"], ratio))
+    return regressions
+
+
+def print_report(report):
+    print(f"{'benchmark':<30} {'n':>5} {'time/call [ms]':>15} {'Mcells/s':>10} {'peak [MB]':>10} {'p-share':>8}")
+    for result in report["results"]:
+        name = result["benchmark"] + "".join(f" {value}" for value in result["options"].values())
+        share = f"{result['pressure_share']:.0%}" if "pressure_share" in result else ""
+        print(f"{name:<30} {result['n']:>5} {1e3 * result['seconds']:>15.3f} {result['cells_per_second'] / 1e6:>10.2f} "
+              f"{result['peak_memory'] / 2**20:>10.2f} {share:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the 2D lid-driven cavity solver.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Numbers of cells per side")
+    parser.add_argument("--solvers", nargs="+", default=list(PRESSURE_SOLVERS), help="Pressure solvers")
+    parser.add_argument("--backend", default="numpy", help="Kernel backend of the time step benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of the operator benchmarks")
+    parser.add_argument("--steps", type=int, default=10, help="Time steps of the step benchmarks")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="Compare against the JSON report of a baseline")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown factor reported as a regression")
+    parser.add_argument("--precision", action="store_true", help="Only run the float32 accuracy check (precision_check)")
+    parser.add_argument("--factor-cache", action="store_true", help="Only run the check of the pressure factorisation cache (factor_cache_check)")
+    args = parser.parse_args(argv)
+
+    if args.factor_cache:
+        print(f"{'n':>5} {'factorise [s]':>14} {'load [s]':>10} {'solve [ms]':>11} {'solve loaded [ms]':>18}")
+        for n in args.sizes:
+            result = factor_cache_check(n)
+            print(f"{n:>5} {result['factorise']:>14.3f} {result['load']:>10.3f} {1e3 * result['solve_factorise']:>11.2f} "
+                  f"{1e3 * result['solve_load']:>18.2f}")
+        return
+
+    if args.precision:
+        print(f"{'mode':<30} {'n':>5} {'time/step [ms]':>15} {'state [MB]':>10} {'u dev':>9} {'v dev':>9} {'p dev':>9}")
+        for n in args.sizes:
+            for result in precision_check(n):
+                name = " ".join(result["options"].values())
+                deviation = result["deviation"]
+                print(f"{name:<30} {n:>5} {1e3 * result['seconds']:>15.3f} {result['state_bytes'] / 2**20:>10.2f} "
+                      f"{deviation['u']:>9.1e} {deviation['v']:>9.1e} {deviation['pressure']:>9.1e}")
+        return
+
+    step_options = [dict(pressure_solver = solver, backend = args.backend) for solver in args.solvers]
+    report = run_benchmarks(args.sizes, args.solvers, step_options, repeat=args.repeat, steps=args.steps)
+    print_report(report)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for benchmark, n, options, reference, seconds, ratio in regressions:
+            print(f"REGRESSION {benchmark} n={n} {options}: {1e3 * reference:.3f} ms -> {1e3 * seconds:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Checkpoints of LidDrivenCavity.run for restarting a run.
+
+A checkpoint holds the minimal state from which the time stepping continues bit for bit: the
+working state u, v, pressure, the step index and physical time, the Adams-Bashforth history of the
+IMEX integrator, the state of the ConvergenceMonitor and the save schedule, the per-step solver
+history and the snapshots already handed to the result sink. It is written to a temporary file
+and renamed, so a run killed while writing leaves the previous checkpoint intact.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from lid_cavity.ResultStore import config_metadata
+
+FORMAT_VERSION = 1
+
+# Settings which do not change the computed trajectory, so they may differ between the
+# checkpointed and the resumed run (e.g. to extend the final time)
+_RUN_SETTINGS = ("T", "nt", "verbose", "save_every", "steady_tol", "divergence_tol", "steady_window",
+                 "pressure_cache_dir", "checkpoint_every", "checkpoint_path", "workers")
+
+
+def config_hash(config, parameters=None):
+    """
+    Hash of the configuration entries which determine the trajectory of a run, and of the
+    JSON-serialisable parameters of the solver which are not part of the configuration (e.g. the
+    members of an ensemble). Functions such as the lid velocity only enter with their name.
+    """
+    metadata = {name: value for name, value in config_metadata(config).items() if name not in _RUN_SETTINGS}
+    if parameters:
+        metadata["parameters"] = parameters
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True).encode()).hexdigest()
+
+
+def save_checkpoint(path, config, arrays, parameters=None, **state):
+    """
+    Atomically write a checkpoint. arrays maps names to arrays, state holds JSON-serialisable
+    values, parameters enter the configuration hash (see config_hash).
+    """
+    header = dict(format_version = FORMAT_VERSION, config_hash = config_hash(config, parameters), **state)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, header=np.array(json.dumps(header)), **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, config, parameters=None):
+    """
+    Read a checkpoint written by save_checkpoint for a run with the given configuration and
+    solver parameters. Returns the arrays and the state as dicts.
+    """
+    with np.load(path) as data:
+        header = json.loads(str(data["header"]))
+        arrays = {name: data[name] for name in data.files if name != "header"}
+
+    if header.pop("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format in {path}.")
+    if header.pop("config_hash") != config_hash(config, parameters):
+        raise ValueError(f"The checkpoint {path} was written for a different configuration.")
+    return arrays, header
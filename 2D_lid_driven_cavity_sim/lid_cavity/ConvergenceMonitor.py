@@ -0,0 +1,71 @@
+import numpy as np
+
+import lid_cavity.diff_operators as diff
+
+
+class ConvergenceMonitor:
+    """
+    Steady-state detection for the lid-driven cavity.
+
+    After every time step the relative rate of change of u, v and pressure,
+    ||f^{n+1} - f^n|| / (||f^{n+1}|| * dt), and the norm of the velocity divergence are computed
+    (root mean square over the interior). The flow is considered steady once all rates are below
+    steady_tol, and the divergence norm below divergence_tol if one is given, for `window`
+    consecutive steps.
+
+    Attributes:
+    -----------
+        steady_tol (float): Threshold of the relative rates of change (per unit time).
+        divergence_tol (float): Threshold of the divergence norm (None to ignore the divergence).
+        window (int): Number of consecutive steps the thresholds have to hold.
+        h (float): Grid spacing.
+        rates (tuple): Relative rates of change of u, v, pressure in the last step.
+        divergence (float): Divergence norm after the last step.
+        count (int): Number of consecutive steps the thresholds hold so far.
+    """
+
+    def __init__(self, steady_tol, h, divergence_tol=None, window=10):
+        self.steady_tol = steady_tol
+        self.divergence_tol = divergence_tol
+        self.window = window
+        self.h = h
+        self.reset()
+
+    def reset(self):
+        self.previous = None
+        self.rates = (np.inf, np.inf, np.inf)
+        self.divergence = np.inf
+        self.count = 0
+
+    @staticmethod
+    def _norm(f):
+        # Per field of a batch (e.g. an ensemble of cavities), a scalar for a single field
+        return np.sqrt(np.mean(f[..., 1:-1, 1:-1]**2, axis=(-2, -1)))
+
+    def _rate(self, f, f_prev, dt):
+        # Largest rate over a batch, so that the batch is steady once all of its fields are
+        scale = self._norm(f)
+        change = self._norm(f - f_prev) / dt
+        return float(np.max(np.where(scale > 0, change / np.where(scale > 0, scale, 1.0), change)))
+
+    def update(self, u, v, p, dt) -> bool:
+        """
+        Record the state after a time step of size dt. Returns True once the flow is steady.
+        """
+        if self.previous is not None:
+            u_prev, v_prev, p_prev = self.previous
+            self.rates = (self._rate(u, u_prev, dt), self._rate(v, v_prev, dt), self._rate(p, p_prev, dt))
+            self.divergence = float(np.max(self._norm(diff.divergence((u, v), self.h))))
+
+            steady = max(self.rates) < self.steady_tol
+            if self.divergence_tol is not None:
+                steady = steady and self.divergence < self.divergence_tol
+            self.count = self.count + 1 if steady else 0
+
+        # Own copies, since the solver reuses its buffers
+        if self.previous is None:
+            self.previous = (np.array(u), np.array(v), np.array(p))
+        else:
+            for buffer, f in zip(self.previous, (u, v, p)):
+                buffer[...] = f
+        return self.count >= self.window
@@ -0,0 +1,324 @@
+"""
+Shared-memory domain decomposition of the time step for multi-core runs of a single cavity.
+
+The interior rows of the grid are split into horizontal strips, one per worker process. The
+working arrays (velocities, intermediate velocities, pressure buffers and Poisson right hand side)
+live in one multiprocessing.shared_memory block, so the halo rows of a strip are read directly
+from the neighbouring strips; synchronising the workers between two stencil applications takes
+the place of the halo exchange. The main process sends the phases of a step (intermediate velocities, Poisson right
+hand side, Jacobi pressure solve, velocity correction) as commands and applies the cheap wall
+boundary conditions itself.
+
+The strips evaluate the same expressions as the serial kernels, so the results agree bit for bit
+with a serial run (with a pressure tolerance, the residual sums are accumulated per strip and the
+iteration count may differ where the residual is within round-off of the tolerance).
+
+The main process waits for the workers with a timeout and watches them while it waits: if a
+worker raises (its traceback is reported), dies or does not finish a command in time, the step
+fails with a RuntimeError instead of waiting forever.
+
+The workers are started with the "spawn" method, as a fork of a process which already runs the
+threads of the Numba backend leaves it hanging at interpreter exit. A script which runs the
+decomposition therefore needs the usual `if __name__ == "__main__":` guard.
+
+Only the stencils and the Jacobi pressure solve are decomposed. With the multigrid, spectral or
+sparse pressure solver the solve runs serially in the main process between the decomposed phases.
+"""
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import lid_cavity.diff_operators as diff
+from lid_cavity.PoissonSolvers import JacobiSolver, apply_pressure_boundary_conditions, interior_norm
+
+FIELDS = ("u", "v", "u_star", "v_star", "pressure_a", "pressure_b", "rhs")
+
+# Start method of the worker processes and their synchronisation primitives (see the module docstring)
+_CONTEXT = mp.get_context("spawn")
+
+# Commands and layout of the control array
+_STOP, _INTERMEDIATE, _DIVERGENCE, _CORRECT, _JACOBI = range(5)
+_CONTROL_SIZE = 16
+
+
+def _arrays(buffer, shape, n_workers):
+    # Views of the fields, the control array and the (double-buffered) per-strip reductions
+    size = shape[0] * shape[1]
+    arrays = {name: np.ndarray(shape, dtype=np.float64, buffer=buffer, offset=8 * i * size) for i, name in enumerate(FIELDS)}
+    offset = 8 * len(FIELDS) * size
+    arrays["control"] = np.ndarray((_CONTROL_SIZE,), dtype=np.float64, buffer=buffer, offset=offset)
+    arrays["partials"] = np.ndarray((2, n_workers), dtype=np.float64, buffer=buffer, offset=offset + 8 * _CONTROL_SIZE)
+    return arrays
+
+
+def _buffer_size(shape, n_workers):
+    return 8 * (len(FIELDS) * shape[0] * shape[1] + _CONTROL_SIZE + 2 * n_workers)
+
+
+def _strip_intermediate(u, v, nu, dt, h, u_out, v_out, j0, j1, first, last, work):
+    # Rows j0..j1-1 of diff.advection_diffusion, evaluated on a block with one halo row on each side
+    block = slice(j0 - 1, j1 + 1)
+    shape = (j1 - j0 + 2, u.shape[1])
+    u_block, v_block = work.get("u_block", shape), work.get("v_block", shape)
+    diff.advection_diffusion(u[block], v[block], nu, dt, h, u_block, v_block, work)
+    u_out[j0:j1] = u_block[1:-1]
+    v_out[j0:j1] = v_block[1:-1]
+    if first:
+        u_out[0] = u[0]
+        v_out[0] = v[0]
+    if last:
+        u_out[-1] = u[-1]
+        v_out[-1] = v[-1]
+
+
+def _worker(index, shm_name, shape, bounds, start, done, strip_barrier, errors):
+    try:
+        _strip_loop(index, shm_name, shape, bounds, start, done, strip_barrier)
+    except Exception:
+        # The main process reports the failure and terminates the other workers
+        errors.put(f"worker {index}: {traceback.format_exc()}")
+
+
+def _strip_loop(index, shm_name, shape, bounds, start, done, strip_barrier):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = _arrays(shm.buf, shape, len(bounds) - 1)
+    control, partials = arrays["control"], arrays["partials"]
+    fields = [arrays[name] for name in FIELDS]
+    j0, j1 = bounds[index], bounds[index + 1]
+    first, last = index == 0, index == len(bounds) - 2
+    rows = slice(j0, j1)
+    work = diff.Workspace()
+
+    while True:
+        start.acquire()
+        command = int(control[0])
+        if command == _STOP:
+            break
+
+        if command == _INTERMEDIATE:
+            u, v, u_out, v_out = (fields[int(i)] for i in control[1:5])
+            nu, dt, h = control[5:8]
+            _strip_intermediate(u, v, nu, dt, h, u_out, v_out, j0, j1, first, last, work)
+
+        elif command == _DIVERGENCE:
+            # out = (du/dx + dv/dy) * scale as diff.divergence followed by out *= scale
+            u, v, out = (fields[int(i)] for i in control[1:4])
+            scale, h = control[4:6]
+            div = np.subtract(u[rows, 2:], u[rows, 0:-2])
+            div /= (2 * h)
+            dv = np.subtract(v[j0+1:j1+1, 1:-1], v[j0-1:j1-1, 1:-1])
+            dv /= (2 * h)
+            div += dv
+            out[rows, 1:-1] = div * scale
+            out[rows, 0] = 0.0
+            out[rows, -1] = 0.0
+            if first:
+                out[0] = 0.0
+            if last:
+                out[-1] = 0.0
+
+        elif command == _CORRECT:
+            # In-place u -= dt * dp/dx, v -= dt * dp/dy on the interior as LidDrivenCavity.correct_velocities
+            u, v, p = (fields[int(i)] for i in control[1:4])
+            dt, h = control[4:6]
+            dp = np.subtract(p[rows, 2:], p[rows, 0:-2])
+            dp /= (2 * h)
+            dp *= dt
+            u[rows, 1:-1] -= dp
+            dp = np.subtract(p[j0+1:j1+1, 1:-1], p[j0-1:j1-1, 1:-1])
+            dp /= (2 * h)
+            dp *= dt
+            v[rows, 1:-1] -= dp
+
+        elif command == _JACOBI:
+            src, dst, rhs = (fields[int(i)] for i in control[1:4])
+            h, max_iter, tol, linf, rhs_norm, n_interior = control[4:10]
+            iterations = 0
+            rel_res = np.nan
+            while iterations < max_iter:
+                dst[rows, 1:-1] = 1/4 * (+src[rows, 0:-2] + src[j0-1:j1-1, 1:-1] + src[rows, 2:  ] + src[j0+1:j1+1, 1:-1] - h**2*rhs[rows, 1:-1])
+                if tol > 0:
+                    res = -4 / h**2 * (dst[rows, 1:-1] - src[rows, 1:-1])
+                    partials[iterations % 2, index] = np.max(np.abs(res), initial=0.0) if linf else np.sum(res**2)
+                # Pressure boundary conditions of the strip (apply_pressure_boundary_conditions)
+                dst[rows, -1] = dst[rows, -2]
+                dst[rows, 0] = dst[rows, 1]
+                if first:
+                    dst[0] = dst[1]
+                if last:
+                    dst[-1] = 0.0
+                strip_barrier.wait()
+                if tol > 0:
+                    reduced = partials[iterations % 2]
+                    res_norm = np.max(reduced) if linf else np.sqrt(np.sum(reduced) / n_interior)
+                    rel_res = res_norm / rhs_norm if rhs_norm > 0 else res_norm
+                    if rel_res <= tol:
+                        break
+                src, dst = dst, src
+                iterations += 1
+            if first:
+                control[10] = iterations
+                control[11] = rel_res
+                control[12] = next(i for i, field in enumerate(fields) if field is src)
+
+        done.release()
+
+
+class StripDecomposition:
+    """
+    Pool of worker processes which own horizontal strips of the interior rows of a
+    (ny+1, nx+1) grid and share the working arrays (FIELDS) with the main process.
+
+    Attributes:
+    -----------
+        nx, ny (int): Number of grid cells in each dimension.
+        n_workers (int): Number of worker processes (at most ny - 1).
+        timeout (float): Seconds the main process waits for the workers to finish a command.
+        poll_interval (float): Seconds between two checks of the workers while waiting.
+        failed (bool): Whether a worker failed; the decomposition can then only be closed.
+        bounds (np.ndarray): Worker i owns the interior rows bounds[i] <= j < bounds[i+1].
+        arrays (dict): Shared arrays by name (FIELDS).
+    """
+
+    def __init__(self, nx, ny, n_workers, timeout=600.0, poll_interval=0.1):
+        self.nx = nx
+        self.ny = ny
+        self.n_workers = max(1, min(n_workers, ny - 1))
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.failed = False
+        self.shape = (ny + 1, nx + 1)
+        self.bounds = np.linspace(1, ny, self.n_workers + 1).astype(int)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=_buffer_size(self.shape, self.n_workers))
+        self.arrays = _arrays(self.shm.buf, self.shape, self.n_workers)
+        self.fields = [self.arrays[name] for name in FIELDS]
+        self.control = self.arrays["control"]
+
+        # One start semaphore per worker and a common one counting the finished commands: unlike a
+        # barrier, a semaphore can be waited on with a timeout and stays usable if a worker dies
+        self.start = [_CONTEXT.Semaphore(0) for _ in range(self.n_workers)]
+        self.done = _CONTEXT.Semaphore(0)
+        # Kept referenced by the main process: a spawned worker opens the named semaphores of the
+        # primitives while it starts, and they are unlinked once the main process frees them
+        self.strip_barrier = _CONTEXT.Barrier(self.n_workers)
+        self.errors = _CONTEXT.Queue()
+        self.workers = [_CONTEXT.Process(target=_worker, args=(i, self.shm.name, self.shape, self.bounds, self.start[i], self.done, self.strip_barrier, self.errors), daemon=True)
+                        for i in range(self.n_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def index(self, array):
+        for i, field in enumerate(self.fields):
+            if array is field:
+                return i
+        raise ValueError("The array is not one of the shared arrays of the decomposition.")
+
+    def _failure(self):
+        # Traceback of a worker which raised, else the exit code of a worker which died (None if all are fine)
+        try:
+            return self.errors.get_nowait()
+        except queue.Empty:
+            pass
+        for i, worker in enumerate(self.workers):
+            if worker.exitcode is not None:
+                try:
+                    # The traceback may still be on its way
+                    return self.errors.get(timeout=1.0)
+                except queue.Empty:
+                    return f"worker {i} exited with code {worker.exitcode}"
+        return None
+
+    def _wait(self):
+        deadline = time.monotonic() + self.timeout
+        for _ in self.workers:
+            while not self.done.acquire(timeout=self.poll_interval):
+                failure = self._failure()
+                if failure is None and time.monotonic() > deadline:
+                    failure = f"the workers did not finish the command within {self.timeout} s"
+                if failure is not None:
+                    self.failed = True
+                    raise RuntimeError(f"The domain decomposition failed: {failure}")
+
+    def _command(self, command, *args):
+        if self.failed:
+            raise RuntimeError("The domain decomposition failed, it can only be closed.")
+        self.control[0] = command
+        self.control[1:1 + len(args)] = args
+        for start in self.start:
+            start.release()
+        self._wait()
+
+    def advection_diffusion(self, u, v, nu, dt, h, u_out, v_out, work=None):
+        """
+        Decomposed counterpart of diff_operators.advection_diffusion (nu must be a scalar).
+        """
+        self._command(_INTERMEDIATE, self.index(u), self.index(v), self.index(u_out), self.index(v_out), nu, dt, h)
+        return u_out, v_out
+
+    def scaled_divergence(self, u, v, h, scale, out):
+        self._command(_DIVERGENCE, self.index(u), self.index(v), self.index(out), scale, h)
+        return out
+
+    def correct_velocities(self, u, v, p, dt, h):
+        # p may be any pressure array, it is copied to a shared buffer if needed
+        if not any(p is field for field in self.fields):
+            self.arrays["pressure_a"][...] = p
+            p = self.arrays["pressure_a"]
+        self._command(_CORRECT, self.index(u), self.index(v), self.index(p), dt, h)
+        return u, v
+
+    def jacobi(self, rhs, p0, h, max_iter, tol, norm, rhs_norm):
+        """
+        Parallel Jacobi iteration (see JacobiSolver). Returns the solution (a shared array), the
+        number of iterations and the relative residual if the tolerance was reached (else nan).
+        """
+        p = self.arrays["pressure_a"]
+        if p0 is None:
+            p[...] = 0.0
+        else:
+            p[...] = p0
+            apply_pressure_boundary_conditions(p)
+        n_interior = (self.ny - 1) * (self.nx - 1)
+        self._command(_JACOBI, self.index(p), self.index(self.arrays["pressure_b"]), self.index(rhs),
+                      h, max_iter, -1.0 if tol is None else tol, norm == "linf", rhs_norm, n_interior)
+        return self.fields[int(self.control[12])], int(self.control[10]), self.control[11]
+
+    def close(self):
+        if not self.failed:
+            self.control[0] = _STOP
+            for start in self.start:
+                start.release()
+        for worker in self.workers:
+            worker.join(0 if self.failed else self.timeout)
+            if worker.is_alive():
+                # Workers of a failed decomposition may wait for each other forever
+                worker.terminate()
+                worker.join()
+        del self.fields, self.control, self.arrays
+        self.shm.close()
+        self.shm.unlink()
+
+
+class DecomposedJacobiSolver(JacobiSolver):
+    """
+    JacobiSolver whose sweeps are split across the strips of a StripDecomposition.
+    rhs must be the shared array "rhs" of the decomposition.
+    """
+
+    def __init__(self, solver: JacobiSolver, decomposition: StripDecomposition):
+        super().__init__(solver.nx, solver.ny, solver.h, tol=solver.tol, max_iter=solver.max_iter, norm=solver.norm)
+        self.decomposition = decomposition
+
+    def solve(self, rhs, p0=None):
+        rhs_norm = interior_norm(rhs, self.norm)
+        p, iterations, rel_res = self.decomposition.jacobi(rhs, p0, self.h, self.max_iter, self.tol, self.norm, rhs_norm)
+        self.last_iterations = iterations
+        if self.tol is None or not rel_res <= self.tol:
+            rel_res = self.relative_residual(p, rhs)
+        self.last_residual = rel_res
+        return p
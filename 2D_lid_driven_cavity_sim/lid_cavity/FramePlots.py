@@ -26,6 +26,7 @@ class FramePlots:
         self.T = config.T
 
         # Extract simulation results
+        self.result = result
         self.u = result.u
         self.v = result.v
         self.pressure = result.pressure
@@ -35,7 +36,7 @@ class FramePlots:
 
     def plot_streamlines_frame(self, result: SimulResult, config: PlotConfig, frame_time, filename):
 
-        frame_index = int(frame_time / self.dt)    
+        frame_index = self.result.frame_index(frame_time)
         u_n = self.u[frame_index]
         v_n = self.v[frame_index]
         speed_n = self.speed[frame_index]
@@ -67,7 +68,7 @@ class FramePlots:
 
     def plot_velocity_frame(self, frame_time, filename = "velocity_field.png"):
 
-        frame_index = int(frame_time / self.dt)    
+        frame_index = self.result.frame_index(frame_time)
         u_n = self.u[frame_index]
         v_n = self.v[frame_index]
         speed_n = self.speed[frame_index]
@@ -89,7 +90,7 @@ class FramePlots:
         plt.contourf(self.grid_x[::self.downsample, ::self.downsample], self.grid_y[::self.downsample, ::self.downsample], speed_n[::self.downsample, ::self.downsample], levels = 50, cmap='viridis')
         plt.colorbar()
 
-        plt.quiver(self.grid_x[::self.downsample, ::self.downsample], self.grid_y[::self.downsample, ::self.downsample], u_n[::self.downsample, ::self.downsample], v_n[::self.downsample, ::self.downsample], arrowsize=1, color="tab:cyan")
+        plt.quiver(self.grid_x[::self.downsample, ::self.downsample], self.grid_y[::self.downsample, ::self.downsample], u_n[::self.downsample, ::self.downsample], v_n[::self.downsample, ::self.downsample], color="tab:cyan")
         plt.xlim((0, self.Lx))
         plt.ylim((0, self.Ly))
         plt.title(f'Velocity field and pressure at time step {frame_time:.2f}')
@@ -0,0 +1,194 @@
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+
+from lid_cavity.ResultStore import open_result
+from lid_cavity.AnimationConfig import AnimationConfig
+
+
+class FrameArtist:
+    """
+    Figure of one animation frame: pressure contours with the velocity as quiver arrows
+    ("velocity") or streamlines ("streamlines").
+
+    The figure, the colorbar and, for "velocity", the quiver are created once and updated for every
+    frame (Quiver.set_UVC); only the contours and streamlines, which matplotlib cannot update, are
+    redrawn. The colour scale is fixed by the pressure range p_min, p_max of the whole animation, and
+    the arrow scale by its largest speed, so that frames drawn by different workers match.
+
+    Attributes:
+    -----------
+        kind (str): "velocity" or "streamlines".
+        grid_x, grid_y (np.ndarray): Node coordinates.
+        Lx, Ly (float): Size of the cavity.
+        downsample (int): Plot every downsample-th node.
+        p_min, p_max (float): Pressure range of the colour scale.
+        max_speed (float): Speed drawn as an arrow of the length of the arrow spacing.
+        levels (int): Number of contour levels.
+    """
+
+    def __init__(self, kind, grid_x, grid_y, Lx, Ly, downsample, p_min, p_max, max_speed=1.0, levels=50, dpi=100):
+        if kind not in ("velocity", "streamlines"):
+            raise ValueError(f"Unknown frame kind '{kind}', use 'velocity' or 'streamlines'.")
+        self.kind = kind
+        self.ds = (slice(None, None, downsample), slice(None, None, downsample))
+        self.x = grid_x[self.ds]
+        self.y = grid_y[self.ds]
+        if p_max <= p_min:
+            p_max = p_min + 1.0
+        self.levels = np.linspace(p_min, p_max, levels)
+        self.norm = Normalize(p_min, p_max)
+        # Quiver scale in data units per unit of velocity; matplotlib would autoscale every figure
+        # from its first frame
+        spacing = self.x[0, 1] - self.x[0, 0] if self.x.shape[1] > 1 else Lx
+        self.arrow_scale = (max_speed if max_speed > 0 else 1.0) / spacing
+
+        self.fig, self.ax = plt.subplots(figsize=(6, 6), dpi=dpi)
+        self.ax.set_xlim((0, Lx))
+        self.ax.set_ylim((0, Ly))
+        self.fig.colorbar(ScalarMappable(norm=self.norm, cmap="viridis"), ax=self.ax)
+        self.title = self.ax.set_title("")
+        self.contour = None
+        self.streamlines = None
+        self.quiver = None
+
+    def draw(self, u, v, p, t):
+        if self.contour is not None:
+            self.contour.remove()
+        self.contour = self.ax.contourf(self.x, self.y, np.clip(p[self.ds], self.levels[0], self.levels[-1]),
+                                        levels=self.levels, cmap="viridis", norm=self.norm)
+
+        if self.kind == "velocity":
+            if self.quiver is None:
+                self.quiver = self.ax.quiver(self.x, self.y, u[self.ds], v[self.ds], color="black", zorder=2,
+                                             angles="xy", scale_units="xy", scale=self.arrow_scale)
+            else:
+                self.quiver.set_UVC(u[self.ds], v[self.ds])
+        else:
+            # The arrows of a streamplot are separate patches, so all new artists are tracked
+            for streamline_artist in self.streamlines or ():
+                streamline_artist.remove()
+            before = set(self.ax.get_children())
+            self.ax.streamplot(self.x, self.y, u[self.ds], v[self.ds], density=1.5, arrowsize=1, color="tab:cyan")
+            self.streamlines = [child for child in self.ax.get_children() if child not in before]
+
+        self.title.set_text(f"Velocity and Pressure Field at t = {t:.2f}")
+        return self.contour
+
+    def close(self):
+        plt.close(self.fig)
+
+
+def pressure_range(pressure, frames):
+    p_min, p_max = np.inf, -np.inf
+    for k in frames:
+        p = np.asarray(pressure[k])
+        p_min = min(p_min, float(p.min()))
+        p_max = max(p_max, float(p.max()))
+    return p_min, p_max
+
+
+def max_speed(result, frames):
+    return max(float(np.max(result.speed[k])) for k in frames)
+
+
+def render_chunk(store_path, kind, frames, first_index, frame_dir, artist_options):
+    """
+    Render the snapshots `frames` of the result store at store_path to
+    frame_dir/frame_<first_index + i>.png. Runs in a worker process.
+    """
+    matplotlib.use("Agg")
+    result = open_result(store_path)
+    artist = FrameArtist(kind, **artist_options)
+    paths = []
+    for i, k in enumerate(frames):
+        artist.draw(result.u[k], result.v[k], result.pressure[k], result.times[k])
+        path = os.path.join(frame_dir, f"frame_{first_index + i:06d}.png")
+        artist.fig.savefig(path)
+        paths.append(path)
+    artist.close()
+    return paths
+
+
+class FrameRenderer:
+    """
+    Renders the frames of an animation in parallel and encodes them with ffmpeg.
+
+    The frame range is split into contiguous chunks, one per worker process. Each worker opens the
+    result store of the run (ResultStore.DirectorySink) as memory maps, so the snapshots are not
+    copied to the workers, and writes one PNG per frame. The PNGs are streamed to a single ffmpeg
+    process as soon as their chunk is done.
+
+    Attributes:
+    -----------
+        store_path (str): Directory of the result store of the run.
+        config (AnimationConfig): Grid, snapshot_skip, downsample and export_dir of the animation.
+        max_workers (int): Number of worker processes (default: number of CPUs).
+        fps (int): Frame rate of the video.
+        dpi (int): Resolution of the frames.
+    """
+
+    def __init__(self, store_path, config: AnimationConfig, max_workers=None, fps=15, dpi=100):
+        self.store_path = store_path
+        self.config = config
+        self.max_workers = max_workers or os.cpu_count()
+        self.fps = fps
+        self.dpi = dpi
+
+    def render(self, kind="velocity", filename="velocity_field.mp4", keep_frames=False):
+        """
+        Render the frames of `kind` ("velocity" or "streamlines") and encode them to
+        export_dir/filename. With filename=None only the PNG frames are written to
+        export_dir/frames_<kind>. Returns the path of the video or of the frame directory.
+        """
+        config = self.config
+        result = open_result(self.store_path)
+        frames = list(range(0, len(result), config.snapshot_skip))
+        p_min, p_max = pressure_range(result.pressure, frames)
+        artist_options = dict(grid_x = config.grid_x, grid_y = config.grid_y, Lx = config.Lx, Ly = config.Ly,
+                              downsample = config.downsample, p_min = p_min, p_max = p_max,
+                              max_speed = max_speed(result, frames), dpi = self.dpi)
+
+        frame_dir = os.path.join(config.export_dir, f"frames_{kind}")
+        os.makedirs(frame_dir, exist_ok=True)
+        encoder = None
+        if filename is not None:
+            encoder = self._start_encoder(os.path.join(config.export_dir, filename))
+
+        n_chunks = min(self.max_workers, len(frames))
+        bounds = np.linspace(0, len(frames), n_chunks + 1).astype(int)
+        # Spawned rather than forked workers, see ParameterSweep.run
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp.get_context("spawn")) as executor:
+            futures = [executor.submit(render_chunk, self.store_path, kind, frames[start:stop], start, frame_dir, artist_options)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+            # Chunks are consumed in order, so encoding overlaps with rendering the later chunks
+            for future in futures:
+                for path in future.result():
+                    if encoder is not None:
+                        with open(path, "rb") as f:
+                            encoder.stdin.write(f.read())
+
+        if encoder is None:
+            return frame_dir
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {encoder.stderr.read().decode(errors='replace')}")
+        if not keep_frames:
+            shutil.rmtree(frame_dir)
+        return os.path.join(config.export_dir, filename)
+
+    def _start_encoder(self, save_path):
+        ffmpeg = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"])
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg was not found; install it or render the frames only with filename=None.")
+        command = [ffmpeg, "-y", "-loglevel", "error", "-f", "image2pipe", "-framerate", str(self.fps), "-i", "-",
+                   "-c:v", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", save_path]
+        return subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
@@ -0,0 +1,259 @@
+"""
+Accuracy-versus-cost validation of the lid-driven cavity against the reference solutions of
+Ghia, Ghia & Shin, "High-Re solutions for incompressible flow using the Navier-Stokes equations
+and a multigrid method", J. Comput. Phys. 48 (1982) 387-411.
+
+Every case runs the unit cavity with lid velocity 1 and nu = 1/Re to a steady state, extracts the
+centreline profiles of the last snapshot and measures their deviation from the tabulated values
+(Tables I and II of the paper). The wall time and error of all cases are written as JSON/CSV and
+plotted as error against wall time with the Pareto front of each Reynolds number, from which the
+cheapest configuration meeting an error tolerance is read off:
+
+    python -m lid_cavity.GhiaValidation --re 100 400 --sizes 16 32 64 --out ghia --tol 0.02
+
+The cases run one after the other, so that their wall times are comparable.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.ticker import NullFormatter
+
+from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.VorticityStreamfunction import VorticityStreamfunctionCavity
+from lid_cavity.ParameterSweep import ConstantLid, centreline_profiles
+
+# Table I: u along the vertical centreline x = 0.5
+GHIA_Y = np.array([1.0000, 0.9766, 0.9688, 0.9609, 0.9531, 0.8516, 0.7344, 0.6172, 0.5000,
+                   0.4531, 0.2813, 0.1719, 0.1016, 0.0703, 0.0625, 0.0547, 0.0000])
+GHIA_U = {
+    100: np.array([1.00000, 0.84123, 0.78871, 0.73722, 0.68717, 0.23151, 0.00332, -0.13641, -0.20581,
+                   -0.21090, -0.15662, -0.10150, -0.06434, -0.04775, -0.04192, -0.03717, 0.00000]),
+    400: np.array([1.00000, 0.75837, 0.68439, 0.61756, 0.55892, 0.29093, 0.16256, 0.02135, -0.11477,
+                   -0.17119, -0.32726, -0.24299, -0.14612, -0.10338, -0.09266, -0.08186, 0.00000]),
+    1000: np.array([1.00000, 0.65928, 0.57492, 0.51117, 0.46604, 0.33304, 0.18719, 0.05702, -0.06080,
+                    -0.10648, -0.27805, -0.38289, -0.29730, -0.22220, -0.20196, -0.18109, 0.00000]),
+}
+
+# Table II: v along the horizontal centreline y = 0.5
+GHIA_X = np.array([1.0000, 0.9688, 0.9609, 0.9531, 0.9453, 0.9063, 0.8594, 0.8047, 0.5000,
+                   0.2344, 0.2266, 0.1563, 0.0938, 0.0781, 0.0703, 0.0625, 0.0000])
+GHIA_V = {
+    100: np.array([0.00000, -0.05906, -0.07391, -0.08864, -0.10313, -0.16914, -0.22445, -0.24533, 0.05454,
+                   0.17527, 0.17507, 0.16077, 0.12317, 0.10890, 0.10091, 0.09233, 0.00000]),
+    400: np.array([0.00000, -0.12146, -0.15663, -0.19254, -0.22847, -0.23827, -0.44993, -0.38598, 0.05188,
+                   0.30174, 0.30203, 0.28124, 0.22965, 0.20920, 0.19713, 0.18360, 0.00000]),
+    1000: np.array([0.00000, -0.21388, -0.27669, -0.33714, -0.39188, -0.51550, -0.42665, -0.31966, 0.02526,
+                    0.32235, 0.33075, 0.37095, 0.32627, 0.30353, 0.29012, 0.27485, 0.00000]),
+}
+
+REYNOLDS = (100, 400, 1000)
+SIZES = (16, 32, 64)
+ENGINES = {"projection": LidDrivenCavity, "vorticity": VorticityStreamfunctionCavity}
+# Solver settings of the ladder: SimulConfig options plus the engine
+SETTINGS = {
+    "spectral": dict(pressure_solver = "spectral"),
+    "multigrid": dict(pressure_solver = "multigrid", pressure_tol = 1e-8),
+    "jacobi-50": dict(pressure_solver = "jacobi", pressure_max_iter = 50),
+    "jacobi-200": dict(pressure_solver = "jacobi", pressure_max_iter = 200),
+    "vorticity": dict(engine = "vorticity"),
+}
+# Final time of the runs which do not reach the steady state before
+FINAL_TIMES = {100: 40.0, 400: 80.0, 1000: 150.0}
+
+
+def ghia_error(result, grid, reynolds):
+    """
+    Deviation of the centreline profiles of the last snapshot from the Ghia et al. tables for
+    Re = reynolds, at the interior reference points (the wall values hold by construction).
+    Returns the maximal and root mean square deviation of u and v.
+    """
+    profiles = centreline_profiles(result, grid)
+    interior = slice(1, -1)
+    du = np.interp(GHIA_Y[interior], profiles["y"], profiles["u"]) - GHIA_U[reynolds][interior]
+    dv = np.interp(GHIA_X[interior], profiles["x"], profiles["v"]) - GHIA_V[reynolds][interior]
+    return dict(u_max = float(np.max(np.abs(du))), v_max = float(np.max(np.abs(dv))),
+                u_rms = float(np.sqrt(np.mean(du**2))), v_rms = float(np.sqrt(np.mean(dv**2))))
+
+
+def time_step(n, nu, time_integrator="euler", dt_factor=0.5):
+    """
+    Time step of the unit cavity with n x n cells and lid velocity 1: the advective CFL limit h
+    and, for the explicit Euler integrator, the diffusive limit h²/(4 nu) and the limit 2 nu of
+    central advection, times dt_factor.
+    """
+    h = 1.0 / n
+    limits = [h]
+    if time_integrator == "euler":
+        limits += [0.25 * h**2 / nu, 2 * nu]
+    return dt_factor * min(limits)
+
+
+def pareto_front(rows):
+    """
+    Cases which are not beaten by a faster case with a smaller or equal error, sorted by wall time.
+    Diverged cases are left out.
+    """
+    front = []
+    best = np.inf
+    for row in sorted((row for row in rows if np.isfinite(row["error"])), key=lambda row: (row["runtime"], row["error"])):
+        if row["error"] < best:
+            front.append(row)
+            best = row["error"]
+    return front
+
+
+class GhiaValidation:
+    """
+    Ladder of grid sizes and solver settings, run to a steady state at several Reynolds numbers
+    and compared with the Ghia et al. reference profiles.
+
+    The error of a case is the maximal deviation of u and v on the centrelines, max(u_max, v_max)
+    of ghia_error. Runs which blow up are stopped early (non-finite velocities) and reported with
+    an infinite error.
+
+    Attributes:
+    -----------
+        reynolds (list): Reynolds numbers, keys of the reference tables (100, 400, 1000).
+        sizes (list): Numbers of cells per side.
+        settings (dict): Solver settings by name: SimulConfig options, and "engine" ("projection" or "vorticity").
+        out_dir (str): Output directory of summary.json, summary.csv and pareto.png.
+        steady_tol (float): Steady-state threshold of the runs (SimulConfig.steady_tol).
+        final_times (dict): Final time by Reynolds number, for runs which do not become steady.
+        dt_factor (float): Safety factor of the time step (see time_step).
+    """
+
+    def __init__(self, out_dir, reynolds=REYNOLDS, sizes=SIZES, settings=None, steady_tol=1e-4, final_times=None, dt_factor=0.5):
+        unknown = [re for re in reynolds if re not in GHIA_U]
+        if unknown:
+            raise ValueError(f"No reference data for Re = {unknown}, use one of {list(GHIA_U)}.")
+        self.out_dir = out_dir
+        self.reynolds = list(reynolds)
+        self.sizes = list(sizes)
+        self.settings = dict(SETTINGS if settings is None else settings)
+        self.steady_tol = steady_tol
+        self.final_times = dict(FINAL_TIMES, **(final_times or {}))
+        self.dt_factor = dt_factor
+
+    def cases(self):
+        for reynolds in self.reynolds:
+            for n in self.sizes:
+                for setting in self.settings:
+                    yield reynolds, n, setting
+
+    def run_case(self, reynolds, n, setting):
+        options = dict(self.settings[setting])
+        engine = options.pop("engine", "projection")
+        nu = 1.0 / reynolds
+        h = 1.0 / n
+        dt = time_step(n, nu, options.get("time_integrator", "euler"), self.dt_factor)
+        T = self.final_times[reynolds]
+        config = SimulConfig(1.0, 1.0, h, dt, T, 1.0, nu, ConstantLid(1.0), verbose=False,
+                             save_every=int(T / dt) + 1, steady_tol=self.steady_tol, **options)
+        config.validate_SimulConfig()
+        grid = GridConstr(config)
+
+        def diverged(state):
+            return not np.isfinite(np.max(np.abs(state.u)))
+
+        start = time.perf_counter()
+        with np.errstate(all="ignore"):
+            result = ENGINES[engine](config, grid).run(callback=diverged, callback_every=100)
+        runtime = time.perf_counter() - start
+
+        finite = bool(np.all(np.isfinite(result.u[-1])) and np.all(np.isfinite(result.v[-1])))
+        errors = ghia_error(result, grid, reynolds) if finite else dict(u_max = np.inf, v_max = np.inf, u_rms = np.inf, v_rms = np.inf)
+        return dict(reynolds = reynolds, n = n, setting = setting, engine = engine, dt = dt,
+                    runtime = runtime, steps = len(result.time_steps), final_time = float(result.times[-1]),
+                    steady_state = bool(result.steady_state), diverged = not finite,
+                    error = max(errors["u_max"], errors["v_max"]), **errors)
+
+    def run(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        rows = []
+        for reynolds, n, setting in self.cases():
+            row = self.run_case(reynolds, n, setting)
+            rows.append(row)
+            print(f"Re = {reynolds:>4}, n = {n:>4}, {setting:<12}: error {row['error']:.3e} in {row['runtime']:.1f} s "
+                  f"({row['steps']} steps{', steady' if row['steady_state'] else ''}{', diverged' if row['diverged'] else ''})")
+        self.write_summary(rows)
+        self.plot_pareto(rows)
+        return rows
+
+    def write_summary(self, rows):
+        with open(os.path.join(self.out_dir, "summary.json"), "w") as f:
+            json.dump(rows, f, indent=2)
+        with open(os.path.join(self.out_dir, "summary.csv"), "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def plot_pareto(self, rows, filename="pareto.png"):
+        """
+        Error against wall time of all cases, one panel per Reynolds number, with the Pareto front.
+        """
+        fig, axes = plt.subplots(1, len(self.reynolds), figsize=(5 * len(self.reynolds), 4.5), squeeze=False)
+        for ax, reynolds in zip(axes[0], self.reynolds):
+            re_rows = [row for row in rows if row["reynolds"] == reynolds and not row["diverged"]]
+            for setting in self.settings:
+                points = [row for row in re_rows if row["setting"] == setting]
+                if points:
+                    ax.scatter([row["runtime"] for row in points], [row["error"] for row in points], label=setting)
+                    for row in points:
+                        ax.annotate(str(row["n"]), (row["runtime"], row["error"]), textcoords="offset points", xytext=(3, 3), fontsize=7)
+            front = pareto_front(re_rows)
+            if front:
+                ax.step([row["runtime"] for row in front], [row["error"] for row in front], where="post", color="black", linewidth=1, label="Pareto front")
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+            ax.xaxis.set_minor_formatter(NullFormatter())
+            ax.set_xlabel("Wall time [s]")
+            ax.set_ylabel("Max. centreline error")
+            ax.set_title(f"Re = {reynolds}")
+            ax.legend(fontsize=7)
+        fig.tight_layout()
+        path = os.path.join(self.out_dir, filename)
+        fig.savefig(path)
+        plt.close(fig)
+        return path
+
+    @staticmethod
+    def cheapest(rows, reynolds, tol):
+        """
+        Fastest case at Re = reynolds whose error is at most tol (None if no case meets the tolerance).
+        """
+        candidates = [row for row in rows if row["reynolds"] == reynolds and row["error"] <= tol]
+        return min(candidates, key=lambda row: row["runtime"], default=None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accuracy-versus-cost validation against Ghia et al. (1982).")
+    parser.add_argument("--re", type=int, nargs="+", default=list(REYNOLDS), help="Reynolds numbers (100, 400, 1000)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Numbers of cells per side")
+    parser.add_argument("--settings", nargs="+", default=list(SETTINGS), choices=list(SETTINGS), help="Solver settings")
+    parser.add_argument("--steady-tol", type=float, default=1e-4, help="Steady-state threshold")
+    parser.add_argument("--dt-factor", type=float, default=0.5, help="Safety factor of the time step")
+    parser.add_argument("--tol", type=float, default=None, help="Report the cheapest case with at most this error")
+    parser.add_argument("--out", required=True, help="Output directory")
+    args = parser.parse_args(argv)
+
+    validation = GhiaValidation(args.out, args.re, args.sizes, {name: SETTINGS[name] for name in args.settings},
+                                steady_tol=args.steady_tol, dt_factor=args.dt_factor)
+    rows = validation.run()
+    if args.tol is not None:
+        for reynolds in args.re:
+            row = GhiaValidation.cheapest(rows, reynolds, args.tol)
+            if row is None:
+                print(f"Re = {reynolds}: no case meets the error tolerance {args.tol}")
+            else:
+                print(f"Re = {reynolds}: cheapest case n = {row['n']}, {row['setting']} with error {row['error']:.3e} in {row['runtime']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,51 @@
+import warnings
+
 import numpy as np
-from tqdm import trange
+from tqdm import tqdm
 
 import lid_cavity.diff_operators as diff
+import lid_cavity.jit_kernels as jit
 from lid_cavity.SimulConfig import SimulConfig
 from lid_cavity.GridConstr import GridConstr
 from lid_cavity.SimulResult import SimulResult
+from lid_cavity.PoissonSolvers import JacobiSolver, make_pressure_solver, solve_dirichlet_helmholtz
+from lid_cavity.ResultSink import MemorySink, SaveSchedule
+from lid_cavity.ConvergenceMonitor import ConvergenceMonitor
+from lid_cavity.Checkpoint import save_checkpoint, load_checkpoint
+from lid_cavity.ResultCache import ResultCache, result_key
+from lid_cavity.Telemetry import NullTelemetry
+from lid_cavity.DomainDecomposition import StripDecomposition, DecomposedJacobiSolver
+
+class StepState:
+    """
+    State of a simulation after a time step, yielded by LidDrivenCavity.steps.
+
+    The fields are read-only views of the working arrays of the solver, which are overwritten by
+    the following time steps; consumers which keep them have to copy them.
+
+    Attributes:
+    -----------
+        n (int): Index of the time step (0 for the initial state).
+        t (float): Physical time.
+        dt (float): Size of the time step (0 for the initial state).
+        fields (dict): The fields by name, e.g. u, v and pressure, which are also attributes.
+    """
+
+    def __init__(self, n, t, dt, **fields):
+        self.n = n
+        self.t = t
+        self.dt = dt
+        self.fields = {}
+        for name, value in fields.items():
+            view = value.view()
+            view.setflags(write=False)
+            self.fields[name] = view
+            setattr(self, name, view)
+
 
 class LidDrivenCavity:
     """
-    Simulation Configuration class for the lid-driven cavity.
+    Simulation Configuration class for the lid-driven cavity (projection method in primitive variables).
 
     Attributes:
     -----------
@@ -19,10 +56,21 @@ class LidDrivenCavity:
         rho (float): Fluid density.
         nu (float): Kinematic viscosity.
         lid_velocity (Callable): Time-dependent lid velocity function.
+        adaptive_dt (bool): Choose dt in every step from the CFL and viscous limits (dt is then the maximal step).
+        cfl (float): Safety factor of the adaptive time step.
+        time_integrator (str): "euler" (explicit Euler) or "imex" (Adams-Bashforth 2 advection, Crank-Nicolson viscosity).
+        t (float): Physical time of the working state.
+        dtype (np.dtype): Floating point type of the velocities and the saved snapshots.
+        pressure_dtype (np.dtype): Floating point type of the pressure Poisson right hand side and solution.
+        engine (str): Name of the solution method, part of the result cache keys and checkpoints.
     """
 
+    engine = "projection"
+
     def __init__(self, config: SimulConfig, grid: GridConstr):
 
+        self.config = config
+        self.grid = grid
         self.Lx = config.Lx
         self.Ly = config.Ly
         self.h = config.h
@@ -32,6 +80,28 @@ class LidDrivenCavity:
         self.nu = config.nu
         self.lid_velocity = config.lid_velocity
         self.verbose = config.verbose
+        self.pressure_warm_start = config.pressure_warm_start
+        self.save_every = config.save_every
+        self.save_interval = config.save_interval
+        self.T = config.T
+        self.dt_max = config.dt
+        self.adaptive_dt = config.adaptive_dt
+        self.cfl = config.cfl
+        self.t = 0.0
+        self.time_integrator = config.time_integrator
+        self.checkpoint_every = config.checkpoint_every
+        self.checkpoint_path = config.checkpoint_path
+        self.result_cache = None
+        if config.result_cache_dir is not None:
+            self.result_cache = ResultCache(config.result_cache_dir, max_bytes=config.result_cache_max_bytes)
+        # Advection terms and size of the previous time step for the Adams-Bashforth 2 extrapolation
+        self.advection_prev = None
+        self.dt_prev = None
+
+        # Steady-state detection for early termination of run
+        self.monitor = None
+        if config.steady_tol is not None:
+            self.monitor = ConvergenceMonitor(config.steady_tol, self.h, divergence_tol=config.divergence_tol, window=config.steady_window)
 
         self.xx = grid.x
         self.yy = grid.y
@@ -41,143 +111,503 @@ class LidDrivenCavity:
         self.grid_x = grid.grid_x 
         self.grid_y = grid.grid_y 
 
-        # Allocate storage arrays to store velocities, pressure, curl and speed
-        self.u = np.zeros((self.nt+1, self.nx + 1, self.ny + 1))
-        self.v = np.zeros((self.nt+1, self.nx + 1, self.ny + 1))
-        self.pressure = np.zeros((self.nt, self.nx + 1, self.ny + 1))
-        self.curl = np.zeros((self.nt+1, self.nx + 1, self.ny + 1))
-        self.speed = np.zeros((self.nt+1, self.nx + 1, self.ny + 1))
-
-        # Catch numerical instability
-        if self.dt > 0.5 * (self.h**2 / self.nu):
+        # Pressure Poisson solver selected in the simulation configuration
+        self.poisson_solver = make_pressure_solver(config, grid)
+
+        # Working state: velocities and pressure of the current time step only. The history is
+        # handed to a ResultSink at the save steps, so memory does not grow with the run length.
+        # The stencils run in the data type of the arrays; the pressure may be kept in double
+        # precision when the velocities are single precision.
+        self.dtype = np.dtype(config.dtype)
+        self.pressure_dtype = np.dtype(config.pressure_dtype or config.dtype)
+        self.u = np.zeros((self.ny + 1, self.nx + 1), dtype=self.dtype)
+        self.v = np.zeros((self.ny + 1, self.nx + 1), dtype=self.dtype)
+        self.pressure = np.zeros((self.ny + 1, self.nx + 1), dtype=self.pressure_dtype)
+        # Second time level of the velocities (intermediate and corrected velocities), swapped with
+        # u, v after every step, and scratch arrays of the stencil operators
+        self.u_star = np.zeros_like(self.u)
+        self.v_star = np.zeros_like(self.v)
+        self.rhs = np.zeros_like(self.pressure)
+        self.work = diff.Workspace()
+        # Stencil kernels of the selected backend
+        self.backend = jit.resolve_backend(config.backend)
+        self.kernels = jit if self.backend == "numba" else diff
+        # Shared-memory domain decomposition of the time step, started by run if config.workers is set
+        self.workers = config.workers
+        self.decomposition = None
+        if self.workers is not None and (self.dtype != np.float64 or self.pressure_dtype != np.float64):
+            warnings.warn("The domain decomposition only supports float64, running serially.", RuntimeWarning)
+            self.workers = None
+        # Per-phase timing and diagnostics of the time steps (disabled unless run is given a Telemetry)
+        self.telemetry = NullTelemetry()
+        # Whether run was given an initial pressure, which then warm starts the first pressure solve
+        self.initial_pressure = False
+        # Per-step history of the pressure solver and the time step
+        self.pressure_iterations = []
+        self.pressure_residuals = []
+        self.time_steps = []
+
+        # Catch numerical instability (the adaptive time step respects the limit by construction,
+        # the implicit viscous step of the IMEX integrator removes it)
+        if not self.adaptive_dt and self.time_integrator == "euler" and self.dt > 0.5 * (self.h**2 / self.nu):
             raise RuntimeError(f"Unstable system: dt = {self.dt}, max allowed = {0.5 * (self.h**2 / self.nu)}")
 
     
     def apply_boundary_conditions(self, u, v, u_lid):
         # 1. Component (horizontal component)
         # bottom and top boundary walls (BE CAREFUL where we define the lid to be, iparticular with the pressure poission equation)
-        u[0, :] = 0.0
-        u[-1, :] = u_lid 
+        u[..., 0, :] = 0.0
+        u[..., -1, :] = u_lid 
         # Left and right boundary walls
-        u[:, 0] = 0.0
-        u[:, -1] = 0.0 
+        u[..., :, 0] = 0.0
+        u[..., :, -1] = 0.0 
 
         # 2. Component (vertical component)
-        v[:, 0] = 0.0
-        v[:, -1] = 0.0
-        v[0, :] = 0.0
-        v[-1, :] = 0.0
+        v[..., :, 0] = 0.0
+        v[..., :, -1] = 0.0
+        v[..., 0, :] = 0.0
+        v[..., -1, :] = 0.0
 
         return u, v
 
-    def one_step_intermediate(self, u, v, du_dx, du_dy, dv_dx, dv_dy, laplace_u, laplace_v):
+    def one_step_intermediate(self, u, v, du_dx=None, du_dy=None, dv_dx=None, dv_dy=None, laplace_u=None, laplace_v=None):
+        """
+        Intermediate velocities u* = u + dt*(-(u*du_dx + v*du_dy) + nu*laplace(u)), v* likewise, of the
+        explicit Euler step, as new arrays without the boundary conditions. Without the derivatives
+        they are computed by the fused advection_diffusion kernel of step (the boundary values are
+        copied from u, v); given full-grid derivative fields they are combined directly.
+        """
         dt = self.dt
+        if du_dx is None:
+            return self.kernels.advection_diffusion(u, v, self.nu, dt, self.h, np.empty_like(u), np.empty_like(v), self.work)
         u_star = u + dt*( - (u*du_dx + v*du_dy) + self.nu*laplace_u)
         v_star = v + dt*( -  (u*dv_dx + v*dv_dy) + self.nu*laplace_v )
         return u_star, v_star
-    
-    def correct_velocities(self, u_star, v_star, p):
+
+    def correct_velocities(self, u_star, v_star, p, u_out=None, v_out=None):
         dt = self.dt
         h = self.h
-        # Compute the discrete derivatives for the pressure
-        dp_dx = diff.central_difference_x(p,h)
-        dp_dy = diff.central_difference_y(p,h)
-        # Compute the update for the velocities
-        u_next = u_star - dt*dp_dx
-        v_next = v_star - dt*dp_dy
+        u_next = np.empty_like(u_star) if u_out is None else u_out
+        v_next = np.empty_like(v_star) if v_out is None else v_out
+        if self.decomposition is not None and u_out is u_star and v_out is v_star:
+            return self.decomposition.correct_velocities(u_star, v_star, p, dt, h)
+        dp = self.work.get("dp", p.shape, u_star.dtype)
+        # Compute the discrete derivatives for the pressure and the update for the velocities
+        # (u_out, v_out may be u_star, v_star for an in-place update)
+        diff.central_difference_x(p, h, out=dp)
+        dp *= dt
+        np.subtract(u_star, dp, out=u_next)
+        diff.central_difference_y(p, h, out=dp)
+        dp *= dt
+        np.subtract(v_star, dp, out=v_next)
         return u_next, v_next
 
-    def rhs_pressure_poisson(self, u, v):
+    def rhs_pressure_poisson(self, u, v, out=None):
         h = self.h
         dt = self.dt
         rho = self.rho
-        divergence_velocity = diff.divergence(np.array([u,v]), h)
-        rhs = (rho / dt)* divergence_velocity
+        if self.decomposition is not None and out is not None:
+            return self.decomposition.scaled_divergence(u, v, h, rho / dt, out)
+        rhs = diff.divergence((u, v), h, out=out, work=self.work)
+        rhs *= (rho / dt)
         return rhs 
 
-    def pressure_poisson_solver(self, rhs, iter = 100):
-        nx = self.nx 
-        ny = self.ny
-        h = self.h
-        p_prev = np.zeros((ny + 1, nx + 1))
-        for _ in range(iter):
-            p_next = np.zeros_like(p_prev)
-            # Update by Jacobi Iteration
-            p_next[1:-1, 1:-1] = 1/4 * (+p_prev[1:-1, 0:-2] + p_prev[0:-2, 1:-1] + p_prev[1:-1, 2:  ] + p_prev[2:  , 1:-1] - h**2*rhs[1:-1, 1:-1])
-
-            # Pressure Boundary Conditions: Homogeneous zero Neumann Boundary
-            # Conditions everywhere except for the top, where it is a homogeneous zero Dirichlet bc 
-            p_next[:, -1] = p_next[:, -2]
-            p_next[0,  :] = p_next[1,  :]
-            p_next[:,  0] = p_next[:,  1]
-            p_next[-1, :] = 0.0
-
-            p_prev = p_next
-        
-        return p_prev
-
-
-    def run(self) -> SimulResult:
-        
-        nx = self.nx
-        ny = self.ny 
-        nt = self.nt
-        h = self.h
-        dt = self.dt
-
-        if self.verbose: 
-            print('Running simulation:')
-
-        # Add the boundary condition to the initial condition with the initial lid velocity
-        self.u[0], self.v[0] = self.apply_boundary_conditions(self.u[0], self.v[0], self.lid_velocity(0))
-        self.curl[0] = diff.curl(np.array([self.u[0], self.v[0]]), h)
-        self.speed[0] = np.sqrt(self.u[0]**2 + self.v[0]**2)
+    def pressure_poisson_solver(self, rhs, p0=None):
+        return self.poisson_solver.solve(rhs, p0)
 
-        for n in trange(nt):
 
-            u_prev = self.u[n]
-            v_prev = self.v[n]
+    def save_snapshot(self, sink, n):
+        # Only the primitive variables are saved, derived fields are computed by SimulResult on demand.
+        # A double precision pressure is saved in the data type of the velocities.
+        sink.write(n, self.t, dict(u = self.u, v = self.v, pressure = self.pressure.astype(self.dtype, copy=False)))
 
-            # Compute discrete differential operators (in space) for the velocity field component at time step t = n*dt
-            du_prev_dx = diff.central_difference_x(u_prev, h)
-            du_prev_dy = diff.central_difference_y(u_prev, h)
-            dv_prev_dx = diff.central_difference_x(v_prev, h)
-            dv_prev_dy = diff.central_difference_y(v_prev, h)
-            laplace_u_prev = diff.laplace(u_prev, h)
-            laplace_v_prev = diff.laplace(v_prev, h)
-
-            # Compute intermediate velocities 
-            u_star, v_star = self.one_step_intermediate(u_prev, v_prev, du_prev_dx, du_prev_dy, dv_prev_dx, dv_prev_dy, laplace_u_prev, laplace_v_prev)
+    def stable_time_step(self):
+        """
+        Largest stable time step for the current velocities: the advective CFL limit
+        dt * (max|u| + max|v|) / h <= 1 and the viscous limit dt <= 0.5 * h² / nu (only for
+        the explicit Euler integrator), multiplied by the safety factor cfl and capped by the
+        maximal time step.
+        """
+        h = self.h
+        max_velocity = np.max(np.abs(self.u)) + np.max(np.abs(self.v))
+        dt_advective = h / max_velocity if max_velocity > 0 else np.inf
+        dt_viscous = 0.5 * (h**2 / np.max(self.nu)) if self.time_integrator == "euler" else np.inf
+        # As a Python float, so that the time is accumulated in double precision for any dtype
+        return float(min(self.cfl * min(dt_advective, dt_viscous), self.dt_max))
+
+    def imex_intermediate(self, n, dt):
+        """
+        Intermediate velocities of the IMEX integrator: Adams-Bashforth 2 for the advection and
+        Crank-Nicolson for the viscous term,
+
+            (u* - u^n)/dt = -((1 + w/2) N(u^n) - w/2 N(u^{n-1})) + nu/2 (laplace(u*) + laplace(u^n)),
+
+        with w = dt_n / dt_{n-1} (explicit Euler in the first step). The Helmholtz equations for
+        u*, v* with the wall velocities at t + dt are solved by discrete sine transforms.
+        """
+        h = self.h
+        u, v = self.u, self.v
+        a = 0.5 * dt * self.nu
+
+        advection = (diff.advection(u, v, u, h), diff.advection(u, v, v, h))
+        if self.advection_prev is None or n == 0:
+            extrapolated = advection
+        else:
+            w = dt / self.dt_prev
+            extrapolated = tuple((1 + w/2) * adv - (w/2) * adv_prev for adv, adv_prev in zip(advection, self.advection_prev))
+        self.advection_prev = advection
+        self.dt_prev = dt
+
+        # Wall values of the intermediate velocities
+        u_wall, v_wall = self.apply_boundary_conditions(np.zeros_like(u), np.zeros_like(v), self.lid_velocity(self.t + dt))
+
+        for f, f_wall, adv, f_out in ((u, u_wall, extrapolated[0], self.u_star), (v, v_wall, extrapolated[1], self.v_star)):
+            # (I - a laplace) f* = f + dt*(-adv) + a laplace(f); the interior part of f* - f_wall
+            # solves (laplace - 1/a) x = -(rhs + a laplace(f_wall)) / a with zero wall values
+            rhs = f - dt * adv + a * diff.laplace(f, h)
+            rhs += a * diff.laplace(f_wall, h)
+            f_out[...] = solve_dirichlet_helmholtz(-rhs / a, h, shift=1 / a)
+            f_out += f_wall
+
+        return self.u_star, self.v_star
+
+    def step(self, n, dt):
+        """
+        Advance the working state u, v, pressure from time self.t to self.t + dt (time step n).
+        """
+        h = self.h
+        t = self.t
+        self.dt = dt
+
+        u_prev = self.u
+        v_prev = self.v
+        telemetry = self.telemetry
+        telemetry.start_step()
+
+        if self.time_integrator == "imex":
+            # Intermediate velocities with implicit viscosity, including the wall values at t + dt
+            u_star, v_star = self.imex_intermediate(n, dt)
+            telemetry.lap("intermediate")
+        else:
+            # Compute intermediate velocities from the advection and diffusion terms at time t
+            u_star, v_star = self.kernels.advection_diffusion(u_prev, v_prev, self.nu, dt, h, self.u_star, self.v_star, self.work)
+            telemetry.lap("intermediate")
 
             # Add the boundary conditions for intermediate velocties (lid_velocity allowed to be time dependent)
-            u_star, v_star = self.apply_boundary_conditions(u_star, v_star, self.lid_velocity(n*dt))
-            
-            # Compute the right hand side for the pressure poission equation 
-            rhs = self.rhs_pressure_poisson(u_star, v_star)
-
-            # Solve the pressure poission equation and save the pressure
-            #p = pressure_poisson(h, rhs)
-            #pressure[n] = p
-            p = self.pressure_poisson_solver(rhs)
-            self.pressure[n] = p
-
-            # Correct the velocities for the incompressibility condition to hold
-            u_next, v_next = self.correct_velocities(u_star, v_star, p)
-
-            # Add the boundary conditions to the updated velocties 
-            u_next, v_next = self.apply_boundary_conditions(u_next, v_next, self.lid_velocity((n+1)*dt))
-            
-            # Store updated velocties
-            self.u[n+1] = u_next
-            self.v[n+1] = v_next
-
-            # Compute curl and speed 
-            self.curl[n+1] = diff.curl(np.array([self.u[n+1], self.v[n+1]]), h)
-            self.speed[n+1] = np.sqrt(self.u[n+1]**2 + self.v[n+1]**2)
+            u_star, v_star = self.apply_boundary_conditions(u_star, v_star, self.lid_velocity(t))
+            telemetry.lap("boundary_conditions")
+
+        # Compute the right hand side for the pressure poission equation 
+        rhs = self.rhs_pressure_poisson(u_star, v_star, out=self.rhs)
+        telemetry.lap("poisson_rhs")
+
+        # Solve the pressure poission equation, warm started from the pressure of the previous step
+        p0 = self.pressure if (self.pressure_warm_start and (n > 0 or self.initial_pressure)) else None
+        p = self.pressure_poisson_solver(rhs, p0)
+        telemetry.lap("pressure_solve")
+        self.pressure = p
+        self.pressure_iterations.append(self.poisson_solver.last_iterations)
+        self.pressure_residuals.append(self.poisson_solver.last_residual)
+        self.time_steps.append(dt)
+
+        # Correct the velocities for the incompressibility condition to hold (in place)
+        u_next, v_next = self.correct_velocities(u_star, v_star, p, u_out=u_star, v_out=v_star)
+        telemetry.lap("correction")
+
+        # Advance the time; with a fixed time step t = n*dt exactly, without accumulated round-off
+        self.t = t + dt if self.adaptive_dt else (n+1)*dt
+
+        # Add the boundary conditions to the updated velocties 
+        u_next, v_next = self.apply_boundary_conditions(u_next, v_next, self.lid_velocity(self.t))
+        telemetry.lap("boundary_conditions")
+
+        # Advance the working state by swapping the two time levels
+        self.u, self.u_star = u_next, u_prev
+        self.v, self.v_star = v_next, v_prev
+
+    def state_arrays(self):
+        # Arrays of the working state and the solver history stored in a checkpoint
+        arrays = dict(u = self.u, v = self.v, pressure = self.pressure,
+                      pressure_iterations = np.array(self.pressure_iterations, dtype=int),
+                      pressure_residuals = np.array(self.pressure_residuals),
+                      time_steps = np.array(self.time_steps))
+        if self.advection_prev is not None:
+            arrays.update(advection_prev_u = self.advection_prev[0], advection_prev_v = self.advection_prev[1])
+        return arrays
+
+    def restore_state_arrays(self, arrays):
+        self.u = arrays["u"]
+        self.v = arrays["v"]
+        self.pressure = arrays["pressure"]
+        self.u_star = np.zeros_like(self.u)
+        self.v_star = np.zeros_like(self.v)
+        self.pressure_iterations = arrays["pressure_iterations"].tolist()
+        self.pressure_residuals = arrays["pressure_residuals"].tolist()
+        self.time_steps = arrays["time_steps"].tolist()
+        self.advection_prev = None
+        if "advection_prev_u" in arrays:
+            self.advection_prev = (arrays["advection_prev_u"], arrays["advection_prev_v"])
+
+    def checkpoint_parameters(self):
+        # Parameters of the trajectory which are not part of the configuration (see config_hash)
+        return None
+
+    def save_checkpoint(self, path, n, schedule, sink):
+        """
+        Write a checkpoint of the state after time step n (see Checkpoint).
+        """
+        arrays = self.state_arrays()
+        monitor = None
+        if self.monitor is not None:
+            if self.monitor.previous is not None:
+                arrays.update(zip(("monitor_u", "monitor_v", "monitor_pressure"), self.monitor.previous))
+            monitor = dict(count = self.monitor.count, rates = [float(rate) for rate in self.monitor.rates],
+                           divergence = float(self.monitor.divergence))
+        save_checkpoint(path, self.config, arrays, self.checkpoint_parameters(), engine = self.engine,
+                        step = n, t = self.t, dt_prev = self.dt_prev, monitor = monitor,
+                        next_save_time = schedule.next_save_time,
+                        sink_steps = [int(step) for step in sink.steps],
+                        sink_times = [float(time) for time in sink.times])
+
+    def load_checkpoint(self, path, schedule, sink):
+        """
+        Restore the state of a checkpoint and reopen the sink for the continued run.
+        Returns the index of the checkpointed time step.
+        """
+        arrays, state = load_checkpoint(path, self.config, self.checkpoint_parameters())
+        if state.get("engine", "projection") != self.engine:
+            raise ValueError(f"The checkpoint {path} was written by the {state.get('engine')} engine, not by {self.engine}.")
+        self.restore_state_arrays(arrays)
+        self.t = state["t"]
+        self.dt_prev = state["dt_prev"]
+        if self.monitor is not None:
+            self.monitor.reset()
+            if state["monitor"] is not None:
+                self.monitor.count = state["monitor"]["count"]
+                self.monitor.rates = tuple(state["monitor"]["rates"])
+                self.monitor.divergence = state["monitor"]["divergence"]
+            if "monitor_u" in arrays:
+                self.monitor.previous = (arrays["monitor_u"], arrays["monitor_v"], arrays["monitor_pressure"])
+        schedule.next_save_time = state["next_save_time"]
+        sink.resume(self.config, self.grid, state["sink_steps"], state["sink_times"])
+        return state["step"]
+
+    def start_decomposition(self):
+        """
+        Move the working state to the shared memory of a StripDecomposition with config.workers
+        worker processes, which then execute the stencils and the Jacobi pressure solve (other
+        pressure solvers keep solving serially).
+        """
+        decomposition = StripDecomposition(self.nx, self.ny, self.workers)
+        for name in ("u", "v", "u_star", "v_star", "rhs"):
+            decomposition.arrays[name][...] = getattr(self, name)
+            setattr(self, name, decomposition.arrays[name])
+        self.serial_kernels = self.kernels
+        self.serial_poisson_solver = self.poisson_solver
+        self.kernels = decomposition
+        if isinstance(self.poisson_solver, JacobiSolver):
+            self.poisson_solver = DecomposedJacobiSolver(self.poisson_solver, decomposition)
+        else:
+            warnings.warn(f"The domain decomposition only parallelises the Jacobi pressure solver, "
+                          f"{type(self.poisson_solver).__name__} runs serially in the main process.", RuntimeWarning)
+        self.decomposition = decomposition
+
+    def stop_decomposition(self):
+        # Copy the working state out of the shared memory before it is released
+        for name in ("u", "v", "u_star", "v_star", "rhs", "pressure"):
+            setattr(self, name, np.array(getattr(self, name)))
+        self.kernels = self.serial_kernels
+        self.poisson_solver = self.serial_poisson_solver
+        self.decomposition.close()
+        self.decomposition = None
+
+    def set_initial_state(self, u0=None, v0=None, pressure0=None):
+        """
+        Copy initial fields of shape (ny+1, nx+1) into the working state; fields which are not
+        given start from zero. The wall values of u0, v0 are replaced by the boundary conditions.
+        """
+        for name, value in (("u", u0), ("v", v0), ("pressure", pressure0)):
+            field = getattr(self, name)
+            if value is None:
+                field[...] = 0.0
+            elif np.shape(value) != field.shape:
+                raise ValueError(f"Initial field {name} must have the shape {field.shape}, got {np.shape(value)}.")
+            else:
+                field[...] = value
+        self.initial_pressure = pressure0 is not None
+
+    def step_state(self, n, dt):
+        # State handed to the consumers of steps(): read-only views of the working arrays
+        return StepState(n, self.t, dt, u = self.u, v = self.v, pressure = self.pressure)
+
+    def steps(self, every=1, sink=None, resume_from=None, telemetry=None, u0=None, v0=None, pressure0=None):
+        """
+        Run the simulation as a generator which yields the state after every `every`-th time step
+        (and after the initial state and the last step) as a StepState of read-only views of the
+        working arrays, without copies. The views are only valid until the generator is resumed.
+
+        The snapshots of config.save_every/save_interval are still handed to the sink (default:
+        MemorySink), so in-situ consumers may reduce the data on the fly and run with a sink which
+        discards the snapshots. The run is stopped after the current state by sending True
+        (generator.send(True)); the sink then ends with a snapshot of the last step, as for a steady
+        state, and the SimulResult is the value of the StopIteration. Leaving the generator early
+        (break, close) closes the sink with the steps computed so far.
+
+            for state in sim.steps(every=100):
+                print(state.n, state.t, np.max(np.abs(state.u)))
+
+        The remaining parameters are those of run, without the result cache.
+        """
+        nt = self.nt
+        sink = MemorySink() if sink is None else sink
+        self.telemetry = NullTelemetry() if telemetry is None else telemetry
+        schedule = SaveSchedule(self.save_every, self.save_interval)
 
-        # Pass the simulation results to SimulResult
-        return SimulResult(u = self.u, v = self.v, pressure = self.pressure, curl = self.curl, speed = self.speed)    
+        if self.verbose: 
+            print('Running simulation:')
 
+        self.steady_state = False
+        if resume_from is not None:
+            n = self.load_checkpoint(resume_from, schedule, sink)
+        else:
+            n = 0
+            # Every new run starts from the given initial fields, not from the state of a previous run
+            self.set_initial_state(u0, v0, pressure0)
+            self.t = 0.0
+            self.pressure_iterations = []
+            self.pressure_residuals = []
+            self.time_steps = []
+            self.advection_prev = None
+            self.dt_prev = None
+            sink.open(self.config, self.grid)
+            # Add the boundary condition to the initial condition with the initial lid velocity
+            self.u, self.v = self.apply_boundary_conditions(self.u, self.v, self.lid_velocity(0))
+            if schedule.due(0, 0.0):
+                self.save_snapshot(sink, 0)
+            if self.monitor is not None:
+                self.monitor.reset()
+                self.monitor.update(self.u, self.v, self.pressure, self.dt_max)
+
+        if self.workers is not None:
+            self.start_decomposition()
+        progress = tqdm(total=self.T if self.adaptive_dt else nt, initial=self.t if self.adaptive_dt else n, disable=not self.verbose)
+        try:
+            stop = False
+            if n % every == 0:
+                stop = yield self.step_state(n, 0.0)
+            # Round-off tolerance for reaching the final time with adaptive time steps
+            t_eps = 1e-12 * self.T
+            while ((self.t < self.T - t_eps) if self.adaptive_dt else (n < nt)) and not stop:
+                if self.adaptive_dt:
+                    dt = min(self.stable_time_step(), self.T - self.t)
+                    if self.save_interval is not None and schedule.next_save_time - self.t > t_eps:
+                        dt = min(dt, schedule.next_save_time - self.t)
+                else:
+                    dt = self.dt_max
+
+                self.step(n, dt)
+                n += 1
+                self.telemetry.end_step(self, n, dt)
+
+                progress.update(dt if self.adaptive_dt else 1)
+                if self.verbose:
+                    progress.set_postfix(p_iter=self.pressure_iterations[-1], p_res=f"{self.pressure_residuals[-1]:.1e}", refresh=False)
+
+                if self.monitor is not None:
+                    self.steady_state = self.monitor.update(self.u, self.v, self.pressure, dt)
+
+                last_step = (self.t >= self.T - t_eps) if self.adaptive_dt else (n == nt)
+                if n % every == 0 or last_step or self.steady_state:
+                    stop = yield self.step_state(n, dt)
+
+                # Hand the snapshot to the sink (the last step is always saved)
+                if schedule.due(n, self.t) or last_step or self.steady_state or stop:
+                    self.save_snapshot(sink, n)
+
+                if self.checkpoint_every is not None and n % self.checkpoint_every == 0:
+                    self.save_checkpoint(self.checkpoint_path, n, schedule, sink)
+
+                if self.steady_state:
+                    if self.verbose:
+                        print(f"Steady state reached after {n} steps at t = {self.t:.4g}")
+                    break
+        except GeneratorExit:
+            # The consumer left the loop: keep what was computed so far
+            self.close_sink(sink)
+            raise
+        finally:
+            progress.close()
+            self.telemetry.close()
+            if self.decomposition is not None:
+                self.stop_decomposition()
+
+        self.close_sink(sink)
+        # Pass the simulation results to SimulResult
+        return sink.result()
+
+    def close_sink(self, sink):
+        sink.close(pressure_iterations = np.array(self.pressure_iterations, dtype=int),
+                   pressure_residuals = np.array(self.pressure_residuals),
+                   time_steps = np.array(self.time_steps),
+                   steady_state = self.steady_state)
+
+    def run(self, sink=None, resume_from=None, telemetry=None, u0=None, v0=None, pressure0=None, callback=None, callback_every=1) -> SimulResult:
+        """
+        Run the simulation and return its result.
+
+        With a fixed time step nt steps of size dt are taken. With adaptive_dt the time step is
+        chosen by stable_time_step until the final time T is reached, and shortened where needed so
+        that the snapshots of save_interval and the final time are hit exactly. If config.steady_tol
+        is set, the run stops as soon as the ConvergenceMonitor detects a steady state; the result
+        then ends with a snapshot of the last computed step.
+
+        With config.checkpoint_every a checkpoint is written to config.checkpoint_path every
+        checkpoint_every steps. A run resumed from such a checkpoint continues bit for bit; its
+        configuration may only differ in settings which do not affect the trajectory (e.g. T).
+
+        With config.result_cache_dir and no sink given, the result of an identical earlier run
+        (see ResultCache.result_key) is returned from the cache without running the simulation,
+        and the result of a new run is stored in the cache. Runs with a callback bypass the cache:
+        the callback has to see the steps, and a run it stops is incomplete.
+
+        :param sink: ResultSink receiving the snapshots selected by config.save_every/save_interval
+                     (default: MemorySink, which keeps them in memory, or the result cache).
+        :param resume_from: Path of a checkpoint to continue from. The sink is resumed, a
+                            DirectorySink on the store of the interrupted run keeps its snapshots.
+        :param telemetry: Telemetry recording the wall time of the phases and diagnostics of every
+                          step (default: disabled).
+        :param u0, v0, pressure0: Initial fields of shape (ny+1, nx+1), e.g. a solution interpolated
+                                  from a coarser grid (default: zero, also for a repeated run).
+                                  pressure0 warm starts the first pressure solve. Runs from given
+                                  initial fields bypass the result cache.
+        :param callback: In-situ analysis callback(state) called with the StepState of every
+                         callback_every-th step (see steps); returning True stops the run.
+        :param callback_every: Interval of the callback in time steps.
+        """
+        initial_fields = any(value is not None for value in (u0, v0, pressure0))
+        cache_sink = None
+        if sink is None and resume_from is None and not initial_fields and callback is None and self.result_cache is not None:
+            key = result_key(self.config, self.grid, self.engine)
+            result = self.result_cache.get(key)
+            if result is not None:
+                if self.verbose:
+                    print(f"Result loaded from the cache {self.result_cache.path}")
+                return result
+            sink = cache_sink = self.result_cache.sink(key)
+
+        generator = self.steps(callback_every if callback is not None else self.nt + 1, sink, resume_from, telemetry, u0, v0, pressure0)
+        try:
+            state = next(generator)
+            while True:
+                state = generator.send(callback is not None and bool(callback(state)))
+        except StopIteration as finished:
+            return finished.value
+        except BaseException:
+            # A failed or interrupted run leaves no partial entry in the result cache
+            if cache_sink is not None:
+                cache_sink.discard()
+            generator.close()
+            raise
 
     def plot_velocity_field(self):
         pass
@@ -0,0 +1,107 @@
+import hashlib
+import warnings
+
+import numpy as np
+
+from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.ResultStore import metadata_value
+import lid_cavity.diff_operators as diff
+
+
+class LidDrivenEnsemble(LidDrivenCavity):
+    """
+    Ensemble of lid-driven cavities on the same grid which are advanced together.
+
+    The working state carries a leading batch axis, u, v, pressure have the shape
+    (n_members, ny+1, nx+1), so that every stencil, boundary condition and pressure solve of a
+    time step is a single vectorised operation over all members. Members may differ in viscosity,
+    lid velocity and initial velocities; time step, final time, grid and solver settings are the
+    ones of the shared configuration. With adaptive_dt all members take the same time step (the
+    most restrictive one), and with steady_tol the run stops once every member is steady.
+
+    The snapshots of run() hold all members, e.g. result.u[k] has the shape (n_members, ny+1, nx+1);
+    result.member(i) gives the SimulResult of member i.
+
+    Attributes:
+    -----------
+        n_members (int): Number of ensemble members.
+        nu (np.ndarray): Kinematic viscosity of each member, shape (n_members, 1, 1).
+        lid_velocities (list): Time-dependent lid velocity function of each member.
+        u0, v0 (np.ndarray): Initial velocities of the members given to the constructor (None: zero).
+
+    Notes:
+    ------
+        The pressure solver tolerance applies to the residual norm over the whole ensemble. The
+        Numba backend (the NumPy kernels are used), the domain decomposition (config.workers) and
+        the result cache are not available for ensembles.
+    """
+
+    def __init__(self, config: SimulConfig, grid: GridConstr, nu=None, lid_velocity=None, u0=None, v0=None, n_members=None):
+        """
+        :param nu: Viscosity of each member (default: config.nu for all members).
+        :param lid_velocity: Lid velocity function of each member (default: config.lid_velocity).
+        :param u0, v0: Initial velocities of the members, shape (n_members, ny+1, nx+1) (default: zero).
+                       They are the initial state of every run which is not given other initial fields.
+        :param n_members: Number of members, only needed if it does not follow from the other arguments.
+        """
+        sizes = {len(values) for values in (nu, lid_velocity, u0, v0) if values is not None}
+        if n_members is not None:
+            sizes.add(n_members)
+        if len(sizes) != 1:
+            raise ValueError(f"Inconsistent or missing ensemble size: {sorted(sizes)}")
+        self.n_members = sizes.pop()
+
+        self.lid_velocities = [config.lid_velocity] * self.n_members if lid_velocity is None else list(lid_velocity)
+        nu = np.full(self.n_members, config.nu) if nu is None else np.asarray(nu, dtype=float)
+        # The stability check of the single cavity is done for the largest viscosity
+        super().__init__(_with_nu(config, float(np.max(nu))), grid)
+        self.config = config
+        self.nu = nu[:, None, None]
+        self.lid_velocity = self.member_lid_velocities
+        # The cache key only describes a single cavity
+        self.result_cache = None
+
+        if self.backend == "numba":
+            warnings.warn("The Numba backend does not support ensembles, using the NumPy backend.", RuntimeWarning)
+            self.backend = "numpy"
+            self.kernels = diff
+        if self.workers is not None:
+            warnings.warn("The domain decomposition does not support ensembles, running serially.", RuntimeWarning)
+            self.workers = None
+
+        shape = (self.n_members, self.ny + 1, self.nx + 1)
+        self.u = np.zeros(shape, dtype=self.dtype) if u0 is None else np.array(u0, dtype=self.dtype)
+        self.v = np.zeros(shape, dtype=self.dtype) if v0 is None else np.array(v0, dtype=self.dtype)
+        if self.u.shape != shape or self.v.shape != shape:
+            raise ValueError(f"Initial velocities must have the shape {shape}")
+        self.u0 = None if u0 is None else self.u.copy()
+        self.v0 = None if v0 is None else self.v.copy()
+        self.pressure = np.zeros(shape, dtype=self.pressure_dtype)
+        self.u_star = np.zeros(shape, dtype=self.dtype)
+        self.v_star = np.zeros(shape, dtype=self.dtype)
+        self.rhs = np.zeros(shape, dtype=self.pressure_dtype)
+
+    def set_initial_state(self, u0=None, v0=None, pressure0=None):
+        # Velocities which are not given start from the initial velocities of the constructor
+        super().set_initial_state(self.u0 if u0 is None else u0, self.v0 if v0 is None else v0, pressure0)
+
+    def checkpoint_parameters(self):
+        # The members enter the configuration hash of the checkpoints, the initial velocities by their hash
+        def array_hash(a):
+            return None if a is None else hashlib.sha256(np.ascontiguousarray(a).tobytes()).hexdigest()
+        return dict(nu = self.nu.ravel().tolist(),
+                    lid_velocity = [metadata_value(lid_velocity) for lid_velocity in self.lid_velocities],
+                    u0 = array_hash(self.u0), v0 = array_hash(self.v0))
+
+    def member_lid_velocities(self, t):
+        # Lid velocity of every member as a column, broadcasting against the lid rows u[..., -1, :]
+        return np.array([lid_velocity(t) for lid_velocity in self.lid_velocities], dtype=float)[:, None]
+
+
+def _with_nu(config, nu):
+    # Shallow copy of the configuration with another viscosity
+    copy = SimulConfig.__new__(SimulConfig)
+    copy.__dict__.update(vars(config), nu=nu)
+    return copy
@@ -0,0 +1,107 @@
+import time
+import warnings
+
+import numpy as np
+
+from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.SimulResult import SimulResult
+from lid_cavity.ResultSink import MemorySink
+from lid_cavity.PoissonSolvers import apply_pressure_boundary_conditions
+
+
+def refine(f):
+    """
+    Bilinear interpolation of fields on a (ny+1, nx+1) node grid onto the grid with half the
+    spacing, shape (2*ny+1, 2*nx+1). The coarse nodes are kept, so are the wall values.
+    """
+    fine = np.zeros(f.shape[:-2] + (2 * (f.shape[-2] - 1) + 1, 2 * (f.shape[-1] - 1) + 1), dtype=f.dtype)
+    fine[..., ::2, ::2] = f
+    fine[..., 1::2, ::2] = 0.5 * (f[..., :-1, :] + f[..., 1:, :])
+    fine[..., ::2, 1::2] = 0.5 * (f[..., :, :-1] + f[..., :, 1:])
+    fine[..., 1::2, 1::2] = 0.25 * (f[..., :-1, :-1] + f[..., 1:, :-1] + f[..., :-1, 1:] + f[..., 1:, 1:])
+    return fine
+
+
+def coarsened_config(config, factor):
+    """
+    Copy of the configuration on the grid coarsened by `factor`, with the time step scaled by the
+    same factor (the advective limit grows with h, the viscous limit with h²). Only the final
+    state of a coarse level is kept, so the snapshot output and checkpoints are switched off.
+    """
+    copy = SimulConfig.__new__(SimulConfig)
+    copy.__dict__.update(vars(config))
+    copy.h = config.h * factor
+    copy.dt = config.dt * factor
+    copy.nx = config.nx // factor
+    copy.ny = config.ny // factor
+    copy.nt = int(config.T / copy.dt)
+    copy.save_every = copy.nt + 1
+    copy.save_interval = None
+    copy.checkpoint_every = None
+    copy.checkpoint_path = None
+    copy.result_cache_dir = None
+    return copy
+
+
+class MeshSequencing:
+    """
+    Coarse-to-fine mesh sequencing for steady solutions.
+
+    The cavity is first solved on a grid coarsened by 2^(n_levels-1) until the ConvergenceMonitor
+    detects a steady state (config.steady_tol). The steady velocities and pressure are interpolated
+    onto the grid refined by 2 (refine) and used as the initial fields of the next level, up to the
+    grid of config. Most of the transient is thus computed on the cheap coarse grids, and the fine
+    levels only remove the discretisation error of the coarser ones.
+
+    Every level runs until its steady state or the final time config.T. A coarse level which does
+    not reach a steady state is passed on with a warning. The result is that of the finest level,
+    whose times start from zero.
+
+    Attributes:
+    -----------
+        config (SimulConfig): Configuration of the target grid, steady_tol must be set.
+        n_levels (int): Number of grids, including the target grid.
+        solver (type): Engine class, LidDrivenCavity or VorticityStreamfunctionCavity.
+        levels (list): Per level of the last run: nx, ny, steps, final time, steady_state and wall time in seconds.
+    """
+
+    def __init__(self, config: SimulConfig, n_levels=3, solver=LidDrivenCavity):
+        if config.steady_tol is None:
+            raise ValueError("Mesh sequencing needs a steady-state criterion, set config.steady_tol.")
+        factor = 2**(n_levels - 1)
+        if n_levels < 1 or config.nx % factor != 0 or config.ny % factor != 0 or min(config.nx, config.ny) // factor < 2:
+            raise ValueError(f"The grid with nx = {config.nx}, ny = {config.ny} cannot be coarsened {n_levels - 1} times by 2.")
+        self.config = config
+        self.n_levels = n_levels
+        self.solver = solver
+        self.levels = []
+
+    def level_configs(self):
+        # From the coarsest grid to the target grid
+        return [coarsened_config(self.config, 2**k) for k in range(self.n_levels - 1, 0, -1)] + [self.config]
+
+    def run(self, sink=None) -> SimulResult:
+        """
+        Run all levels and return the result of the finest level.
+
+        :param sink: ResultSink of the finest level (default: MemorySink).
+        """
+        self.levels = []
+        fields = {}
+        configs = self.level_configs()
+        for level, config in enumerate(configs):
+            finest = level == len(configs) - 1
+            sim = self.solver(config, GridConstr(config))
+            start = time.perf_counter()
+            result = sim.run(sink=sink if finest else MemorySink(), **fields)
+            self.levels.append(dict(nx = config.nx, ny = config.ny, steps = len(sim.time_steps), t = float(sim.t),
+                                    steady_state = sim.steady_state, seconds = time.perf_counter() - start))
+            if config.verbose:
+                print(f"Level {level}: {config.nx} x {config.ny} cells, {len(sim.time_steps)} steps, steady state: {sim.steady_state}")
+            if finest:
+                return result
+            if not sim.steady_state:
+                warnings.warn(f"Level {level} ({config.nx} x {config.ny} cells) did not reach a steady state by T = {config.T}.", RuntimeWarning)
+            fields = dict(u0 = refine(sim.u), v0 = refine(sim.v), pressure0 = apply_pressure_boundary_conditions(refine(sim.pressure)))
@@ -0,0 +1,188 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.ResultStore import DirectorySink
+
+
+class ConstantLid:
+    """
+    Constant lid velocity U. Unlike a lambda it can be sent to worker processes.
+    """
+
+    def __init__(self, U):
+        self.U = U
+
+    def __call__(self, t):
+        return self.U
+
+    def __repr__(self):
+        return f"ConstantLid(U={self.U})"
+
+
+class RampedLid:
+    """
+    Lid velocity ramped up linearly from 0 to U over the time t_ramp, then constant.
+    """
+
+    def __init__(self, U, t_ramp):
+        self.U = U
+        self.t_ramp = t_ramp
+
+    def __call__(self, t):
+        return self.U * min(t / self.t_ramp, 1.0)
+
+    def __repr__(self):
+        return f"RampedLid(U={self.U}, t_ramp={self.t_ramp})"
+
+
+def centreline_profiles(result, grid):
+    """
+    Horizontal velocity u along the vertical centreline x = Lx/2 and vertical velocity v along the
+    horizontal centreline y = Ly/2 of the last snapshot (interpolated between the two middle nodes
+    for odd nx, ny).
+    """
+    u = np.asarray(result.u[-1])
+    v = np.asarray(result.v[-1])
+    u_centre = 0.5 * (u[:, grid.nx // 2] + u[:, (grid.nx + 1) // 2])
+    v_centre = 0.5 * (v[grid.ny // 2, :] + v[(grid.ny + 1) // 2, :])
+    return dict(y = grid.y, u = u_centre, x = grid.x, v = v_centre)
+
+
+def run_case(name, params, out_dir):
+    """
+    Run a single case of a sweep and store its result in out_dir/name.
+    Returns the summary row of the case. Runs in a worker process.
+    """
+    params = dict(params)
+    lid_velocity = params.pop("lid_velocity")
+    if not callable(lid_velocity):
+        lid_velocity = ConstantLid(lid_velocity)
+    params.setdefault("verbose", False)
+
+    config = SimulConfig(lid_velocity=lid_velocity, **params)
+    config.validate_SimulConfig()
+    grid = GridConstr(config)
+    case_dir = os.path.join(out_dir, name)
+
+    start = time.perf_counter()
+    result = LidDrivenCavity(config, grid).run(DirectorySink(case_dir))
+    runtime = time.perf_counter() - start
+
+    profiles = centreline_profiles(result, grid)
+    np.savez(os.path.join(case_dir, "centreline_profiles.npz"), **profiles)
+
+    return dict(name = name,
+                **{key: value for key, value in params.items() if key != "verbose"},
+                lid_velocity = repr(lid_velocity),
+                reynolds = lid_velocity(config.T) * config.Lx / config.nu,
+                runtime = runtime,
+                steps = len(result.time_steps),
+                final_time = float(result.times[-1]),
+                steady_state = bool(result.steady_state),
+                mean_pressure_iterations = float(np.mean(result.pressure_iterations)),
+                final_pressure_residual = float(result.pressure_residuals[-1]),
+                final_kinetic_energy = float(result.kinetic_energy[-1]),
+                u_centreline = profiles["u"].tolist(),
+                v_centreline = profiles["v"].tolist())
+
+
+class ParameterSweep:
+    """
+    Runs the lid-driven cavity for all combinations of a grid of parameter values in parallel.
+
+    Every case writes its result store (ResultStore.DirectorySink) and its centreline profiles to
+    out_dir/<case name>. The summary of all cases (runtime, steps, final pressure residual,
+    centreline profiles, ...) is written to out_dir/summary.json and, without the profiles,
+    to out_dir/summary.csv.
+
+    Attributes:
+    -----------
+        base (dict): SimulConfig keyword arguments shared by all cases.
+        values (dict): SimulConfig keyword arguments with the list of values to sweep over,
+                       e.g. {"nu": [0.01, 0.001], "lid_velocity": [1.0, RampedLid(1.0, 0.5)]}.
+                       Numbers given as lid_velocity are constant lid velocities.
+        out_dir (str): Output directory of the sweep.
+        max_workers (int): Number of worker processes (default: number of CPUs).
+
+    The cases run in spawned processes, so the lid velocities have to be picklable (e.g.
+    ConstantLid or RampedLid, no lambdas) and a calling script needs the `if __name__ == "__main__":` guard.
+    """
+
+    def __init__(self, base, values, out_dir, max_workers=None):
+        self.base = base
+        self.values = values
+        self.out_dir = out_dir
+        self.max_workers = max_workers
+
+    def cases(self):
+        names = list(self.values)
+        for i, combination in enumerate(itertools.product(*(self.values[name] for name in names))):
+            yield f"case_{i:04d}", dict(self.base, **dict(zip(names, combination)))
+
+    def run(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        rows = []
+        # Spawned rather than forked workers: a fork of a process which already runs the threads of
+        # the Numba backend hangs at interpreter exit
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp.get_context("spawn")) as executor:
+            futures = {executor.submit(run_case, name, params, self.out_dir): name for name, params in self.cases()}
+            for future in as_completed(futures):
+                row = future.result()
+                rows.append(row)
+                print(f"{row['name']}: {row['steps']} steps in {row['runtime']:.1f} s")
+
+        rows.sort(key=lambda row: row["name"])
+        self.write_summary(rows)
+        return rows
+
+    def write_summary(self, rows):
+        with open(os.path.join(self.out_dir, "summary.json"), "w") as f:
+            json.dump(rows, f, indent=2)
+
+        columns = [key for key in rows[0] if key not in ("u_centreline", "v_centreline")]
+        with open(os.path.join(self.out_dir, "summary.csv"), "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep of the 2D lid-driven cavity.")
+    parser.add_argument("--nu", type=float, nargs="+", required=True, help="Kinematic viscosities")
+    parser.add_argument("--lid-velocity", type=float, nargs="+", default=[1.0], help="Constant lid velocities")
+    parser.add_argument("--lid-ramp", type=float, default=None, help="Ramp the lid velocity up over this time")
+    parser.add_argument("--h", type=float, nargs="+", required=True, help="Grid spacings")
+    parser.add_argument("--T", type=float, nargs="+", required=True, help="Final times")
+    parser.add_argument("--dt", type=float, required=True, help="(Maximal) time step")
+    parser.add_argument("--L", type=float, default=1.0, help="Side length of the cavity")
+    parser.add_argument("--rho", type=float, default=1.0, help="Fluid density")
+    parser.add_argument("--pressure-solver", default="spectral", help="Pressure Poisson solver")
+    parser.add_argument("--time-integrator", default="euler", help="Time integrator")
+    parser.add_argument("--adaptive-dt", action="store_true", help="Adaptive time step")
+    parser.add_argument("--steady-tol", type=float, default=None, help="Stop at steady state")
+    parser.add_argument("--save-every", type=int, default=100, help="Snapshot interval in steps")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--out", required=True, help="Output directory")
+    args = parser.parse_args(argv)
+
+    lids = [U if args.lid_ramp is None else RampedLid(U, args.lid_ramp) for U in args.lid_velocity]
+    base = dict(Lx = args.L, Ly = args.L, dt = args.dt, rho = args.rho,
+                pressure_solver = args.pressure_solver, time_integrator = args.time_integrator,
+                adaptive_dt = args.adaptive_dt, steady_tol = args.steady_tol, save_every = args.save_every)
+    values = dict(nu = args.nu, lid_velocity = lids, h = args.h, T = args.T)
+    ParameterSweep(base, values, args.out, max_workers=args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shutil
+from functools import lru_cache
+
+import numpy as np
+
+from lid_cavity.ResultStore import DirectorySink, config_metadata, open_result
+from lid_cavity.SimulResult import SimulResult
+
+# Settings which do not change the result of a run
+_NON_RESULT_SETTINGS = ("verbose", "pressure_cache_dir", "checkpoint_every", "checkpoint_path",
+                        "result_cache_dir", "result_cache_max_bytes", "workers")
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """
+    Hash of the source files of the lid_cavity package, so that cached results are not reused
+    after the solver code changed.
+    """
+    digest = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith(".py"):
+            digest.update(name.encode())
+            with open(os.path.join(package_dir, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def result_key(config, grid, engine="projection"):
+    """
+    Stable hash of everything which determines the result of a run: the configuration including
+    the solver options, the grid, the solution method (engine), the code version and the lid
+    velocity sampled on the time grid t = k*dt, k = 0, ..., nt (so different functions with the
+    same values share a key).
+    """
+    metadata = {name: value for name, value in config_metadata(config).items() if name not in _NON_RESULT_SETTINGS}
+    if callable(config.lid_velocity):
+        lid = np.array([config.lid_velocity(k * config.dt) for k in range(config.nt + 1)], dtype=float)
+    else:
+        lid = np.asarray(config.lid_velocity, dtype=float)
+    metadata["lid_velocity"] = hashlib.sha256(lid.tobytes()).hexdigest()
+    metadata["grid"] = dict(Lx = grid.Lx, Ly = grid.Ly, nx = grid.nx, ny = grid.ny, h = grid.h)
+    metadata["engine"] = engine
+    metadata["code_version"] = code_version()
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of simulation results, one result store (ResultStore.DirectorySink) per key.
+
+    Entries are written to a temporary directory and renamed when the run is complete, so
+    interrupted runs never show up as cache entries. A failed run removes its temporary directory,
+    and evict removes those of killed runs. After every new entry the least recently
+    used entries are evicted until the cache holds at most max_entries entries of at most
+    max_bytes in total.
+
+    Attributes:
+    -----------
+        path (str): Directory of the cache.
+        max_bytes (int): Maximal total size of the entries (None: unlimited).
+        max_entries (int): Maximal number of entries (None: unlimited).
+    """
+
+    def __init__(self, path, max_bytes=None, max_entries=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(path, exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key)
+
+    def get(self, key) -> SimulResult:
+        """
+        Cached result of key, or None on a miss.
+        """
+        path = self.entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        # The modification time of the entry directory records its last use
+        os.utime(path)
+        return open_result(path)
+
+    def sink(self, key):
+        """
+        Result sink of a run whose result is stored under key when the sink is closed.
+        """
+        return CacheSink(self, key)
+
+    def commit(self, key, tmp_path):
+        path = self.entry_path(key)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Stored concurrently by another run of the same configuration
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict(keep=key)
+        return path
+
+    def stale_tmp_dirs(self):
+        """
+        Temporary directories <key>.<pid>.tmp of runs whose process no longer exists, e.g. left
+        behind by a killed run.
+        """
+        stale = []
+        for name in os.listdir(self.path):
+            parts = name.split(".")
+            if len(parts) == 3 and parts[2] == "tmp" and parts[1].isdigit() and not _process_alive(int(parts[1])):
+                stale.append(self.entry_path(name))
+        return stale
+
+    def entries(self):
+        """
+        Keys, sizes in bytes and last use of the complete entries, least recently used first.
+        """
+        entries = []
+        for key in os.listdir(self.path):
+            path = self.entry_path(key)
+            if key.endswith(".tmp") or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+            entries.append((key, size, os.path.getmtime(path)))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """
+        Remove the stale temporary directories of dead runs, then the least recently used entries
+        (except keep) until the limits hold.
+        """
+        for path in self.stale_tmp_dirs():
+            shutil.rmtree(path, ignore_errors=True)
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for key, size, _ in entries:
+            if (self.max_bytes is None or total <= self.max_bytes) and (self.max_entries is None or count <= self.max_entries):
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.entry_path(key), ignore_errors=True)
+            total -= size
+            count -= 1
+
+    def clear(self):
+        for key, _, _ in self.entries():
+            shutil.rmtree(self.entry_path(key), ignore_errors=True)
+
+
+def _process_alive(pid):
+    if os.name != "posix":
+        # os.kill would terminate the process on Windows, keep the directory
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class CacheSink(DirectorySink):
+    """
+    DirectorySink writing to a temporary directory of a ResultCache, which becomes the cache entry
+    of its key when the sink is closed. A failed or interrupted run discards the directory instead
+    (discard), so that it never becomes an entry.
+
+    Attributes:
+    -----------
+        discarded (bool): Whether the temporary directory was discarded; closing the sink then does nothing.
+    """
+
+    def __init__(self, cache, key, dtype=None, compress=False):
+        super().__init__(os.path.join(cache.path, f"{key}.{os.getpid()}.tmp"), dtype=dtype, compress=compress)
+        self.cache = cache
+        self.key = key
+        self.discarded = False
+
+    def discard(self):
+        self.discarded = True
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def close(self, **summary):
+        if self.discarded:
+            return
+        super().close(**summary)
+        self.path = self.cache.commit(self.key, self.path)
@@ -0,0 +1,104 @@
+import numpy as np
+
+from lid_cavity.SimulResult import SimulResult, SnapshotSeries
+
+
+class SaveSchedule:
+    """
+    Decides at which time steps a snapshot of the simulation is handed to the result sink.
+
+    Attributes:
+    -----------
+        save_every (int): Save every k-th time step.
+        save_interval (float): Save whenever this much physical time has passed (overrides save_every).
+    """
+
+    def __init__(self, save_every=1, save_interval=None):
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.next_save_time = 0.0
+
+    def due(self, step, time):
+        if self.save_interval is None:
+            return step % self.save_every == 0
+        # Small tolerance so that round-off in the accumulated time does not skip a snapshot
+        if time >= self.next_save_time - 1e-9 * self.save_interval:
+            self.next_save_time = (np.floor(time / self.save_interval + 1e-9) + 1) * self.save_interval
+            return True
+        return False
+
+
+class ResultSink:
+    """
+    Base class for the output of LidDrivenCavity.run.
+
+    The solver only keeps its current state and hands snapshots to the sink at the steps chosen
+    by the SaveSchedule. Subclasses decide where the snapshots go.
+
+    Attributes:
+    -----------
+        steps (list): Time step index of every snapshot.
+        times (list): Physical time of every snapshot.
+        summary (dict): Per-step diagnostics passed to close, e.g. the pressure solver history.
+        h (float): Grid spacing of the run.
+        rho (float): Fluid density of the run.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.times = []
+        self.summary = {}
+        self.h = None
+        self.rho = 1.0
+
+    def open(self, config, grid):
+        self.h = grid.h
+        self.rho = config.rho
+        self.steps = []
+        self.times = []
+        self.summary = {}
+
+    def resume(self, config, grid, steps, times):
+        """
+        Continue a run restarted from a checkpoint, after the snapshots of the given steps and times
+        were written. Sinks which cannot recover these snapshots start empty.
+        """
+        self.open(config, grid)
+
+    def write(self, step, time, fields):
+        """
+        Store the snapshot of time step `step` at physical time `time`. fields maps names to arrays,
+        which belong to the solver and may be overwritten after write returns.
+        """
+        self.steps.append(step)
+        self.times.append(time)
+
+    def close(self, **summary):
+        self.summary = summary
+
+    def result(self) -> SimulResult:
+        raise NotImplementedError
+
+
+class MemorySink(ResultSink):
+    """
+    Keeps copies of all snapshots in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.snapshots = {}
+
+    def open(self, config, grid):
+        super().open(config, grid)
+        self.snapshots = {}
+
+    def write(self, step, time, fields):
+        super().write(step, time, fields)
+        for name, value in fields.items():
+            self.snapshots.setdefault(name, []).append(np.array(value))
+
+    def result(self) -> SimulResult:
+        series = {name: SnapshotSeries(snapshots.__getitem__, len(snapshots), snapshots[0].shape, snapshots[0].dtype)
+                  for name, snapshots in self.snapshots.items()}
+        return SimulResult(**series, times=np.array(self.times), steps=np.array(self.steps), h=self.h, rho=self.rho, **self.summary)
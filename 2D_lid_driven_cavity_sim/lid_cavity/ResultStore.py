@@ -0,0 +1,164 @@
+import json
+import os
+
+import numpy as np
+
+from lid_cavity.ResultSink import ResultSink
+from lid_cavity.SimulResult import SimulResult, SnapshotSeries
+
+FORMAT_VERSION = 1
+
+
+def metadata_value(value):
+    """
+    JSON-serialisable description of a configuration value. Functions are stored by name, other
+    objects by their repr if they define one (e.g. ParameterSweep.ConstantLid(U=1.0) or a pressure
+    solver instance with its parameters), else by class name.
+    """
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return np.asarray(value).tolist()
+    if hasattr(value, "__name__"):
+        return value.__name__
+    if type(value).__repr__ is not object.__repr__:
+        return repr(value)
+    return type(value).__name__
+
+
+def config_metadata(config):
+    """
+    JSON-serialisable description of a SimulConfig (see metadata_value).
+    """
+    return {name: metadata_value(value) for name, value in vars(config).items()}
+
+
+def write_json(path, data):
+    # Write to a temporary file first so that readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class DirectorySink(ResultSink):
+    """
+    Writes the snapshots to a directory with one .npy file per snapshot and field:
+
+        path/meta.json            configuration, grid, fields, storage options and snapshot times
+        path/<field>/000000.npy   snapshot 0 of <field>, ...
+
+    Uncompressed snapshots are opened as read-only memory maps by open_result, so that large runs
+    can be post-processed without loading them and several processes can share one run.
+    With compress=True every snapshot is a zlib compressed .npz file instead (lossless, but no
+    memory mapping). dtype=np.float32 halves the size of the store at the cost of precision.
+
+    Attributes:
+    -----------
+        path (str): Directory of the store.
+        dtype (np.dtype): Storage data type of the snapshots (None to keep the solver data type).
+        compress (bool): Store zlib compressed snapshots.
+    """
+
+    def __init__(self, path, dtype=None, compress=False):
+        super().__init__()
+        self.path = path
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.compress = compress
+        self.meta = {}
+
+    def open(self, config, grid):
+        super().open(config, grid)
+        os.makedirs(self.path, exist_ok=True)
+        self.meta = dict(format_version = FORMAT_VERSION,
+                         status = "running",
+                         config = config_metadata(config),
+                         grid = dict(Lx = grid.Lx, Ly = grid.Ly, nx = grid.nx, ny = grid.ny, h = grid.h),
+                         dtype = None if self.dtype is None else self.dtype.name,
+                         compress = self.compress,
+                         fields = [],
+                         steps = [],
+                         times = [])
+        write_json(os.path.join(self.path, "meta.json"), self.meta)
+
+    def resume(self, config, grid, steps, times):
+        # Keep the snapshots written before the checkpoint, later ones are overwritten
+        meta_path = os.path.join(self.path, "meta.json")
+        fields = []
+        if steps and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                fields = json.load(f)["fields"]
+        self.open(config, grid)
+        self.steps = list(steps)
+        self.times = list(times)
+        self.meta["fields"] = fields
+        if not fields:
+            self.steps = []
+            self.times = []
+
+    def snapshot_path(self, field, k):
+        return os.path.join(self.path, field, f"{k:06d}" + (".npz" if self.compress else ".npy"))
+
+    def write(self, step, time, fields):
+        k = len(self.steps)
+        super().write(step, time, fields)
+        for name, value in fields.items():
+            if k == 0:
+                os.makedirs(os.path.join(self.path, name), exist_ok=True)
+                self.meta["fields"].append(name)
+            value = np.asarray(value, dtype=self.dtype)
+            if self.compress:
+                np.savez_compressed(self.snapshot_path(name, k), snapshot=value)
+            else:
+                np.save(self.snapshot_path(name, k), value)
+        if k == 0:
+            # Record the fields right away, so that a resumed run finds them
+            write_json(os.path.join(self.path, "meta.json"), self.meta)
+
+    def close(self, **summary):
+        super().close(**summary)
+        self.meta.update(status = "complete",
+                         steps = [int(step) for step in self.steps],
+                         times = [float(time) for time in self.times],
+                         summary = {name: np.asarray(value).tolist() for name, value in summary.items()})
+        write_json(os.path.join(self.path, "meta.json"), self.meta)
+
+    def result(self) -> SimulResult:
+        return open_result(self.path)
+
+
+def open_result(path) -> SimulResult:
+    """
+    Open a result store written by DirectorySink as a SimulResult whose fields load their
+    snapshots lazily (memory mapped for uncompressed stores).
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported result store format version {meta['format_version']}.")
+
+    n = len(meta["steps"])
+    compress = meta["compress"]
+
+    def loader(field):
+        def load(k):
+            if compress:
+                with np.load(os.path.join(path, field, f"{k:06d}.npz")) as data:
+                    return data["snapshot"]
+            return np.load(os.path.join(path, field, f"{k:06d}.npy"), mmap_mode="r")
+        return load
+
+    series = {}
+    for field in meta["fields"]:
+        first = loader(field)(0)
+        series[field] = SnapshotSeries(loader(field), n, first.shape, first.dtype)
+
+    # Per-step histories are stored as lists, scalars (e.g. steady_state) stay Python scalars
+    summary = {name: np.asarray(value) if isinstance(value, list) else value
+               for name, value in meta.get("summary", {}).items()}
+    result = SimulResult(**series, times=np.array(meta["times"]), steps=np.array(meta["steps"]), metadata=meta,
+                         h=meta["grid"]["h"], rho=meta["config"].get("rho", 1.0), **summary)
+    result.path = path
+    return result
@@ -1,5 +1,10 @@
 import numpy as np 
 
+from lid_cavity.PoissonSolvers import PRESSURE_SOLVERS
+from lid_cavity.jit_kernels import BACKENDS
+
+DTYPES = ("float64", "float32")
+
 class SimulConfig: 
     '''
     Simulation Configuration class for the lid driven cavity 
@@ -14,13 +19,49 @@ class SimulConfig:
         nu (float): Kinematic viscosity
         lid_velocity (callable): Possible time dependent Lid velocity
         nx, ny (int): Number of grid points in each dimension
+        pressure_solver (str or PressureSolver): Pressure Poisson solver (name in PRESSURE_SOLVERS or instance)
+        pressure_tol (float): Relative residual tolerance of the pressure solver
+        pressure_max_iter (int): Maximal number of sweeps/cycles of the pressure solver
+        multigrid_cycle (str): Multigrid cycle type ("V" or "W")
+        pressure_norm (str): Residual norm of the pressure tolerance ("l2" or "linf")
+        pressure_warm_start (bool): Start the pressure solver from the pressure of the previous time step
+        pressure_cache_dir (str): Directory of the on-disk cache of the LU factors of the sparse direct pressure solver
+                                  (reused by later runs instead of factorising; needs Numba for the triangular solves)
+        save_every (int): Save a snapshot of the solution every save_every time steps
+        save_interval (float): Save a snapshot every save_interval of physical time (overrides save_every)
+        adaptive_dt (bool): Choose the time step adaptively from the CFL and viscous limits, with dt as maximal step
+        cfl (float): Safety factor of the adaptive time step
+        steady_tol (float): Stop the run once the relative rates of change of u, v, pressure are below steady_tol (None: never)
+        divergence_tol (float): Additional threshold on the divergence norm for the steady state
+        steady_window (int): Number of consecutive steps the steady-state thresholds have to hold
+        time_integrator (str): "euler" (explicit) or "imex" (Adams-Bashforth 2 advection, Crank-Nicolson viscosity, no diffusive dt limit)
+        backend (str): Kernel backend, "numpy" or "numba" (compiled, multithreaded; falls back to NumPy if Numba is missing)
+        checkpoint_every (int): Write a checkpoint every checkpoint_every time steps (None: never)
+        checkpoint_path (str): File of the checkpoint (.npz), overwritten atomically by every checkpoint
+        result_cache_dir (str): Directory of the on-disk result cache; run() returns a stored result of an identical run (None: no cache)
+        workers (int): Number of worker processes of the shared-memory domain decomposition of the time step (None: serial);
+                       only the stencils and the Jacobi pressure solver are parallelised, other pressure solvers run serially
+        result_cache_max_bytes (int): Size limit of the result cache, least recently used results are evicted (None: unlimited)
+        dtype (str): Floating point type of the velocities, the stencils and the saved snapshots, "float64" or "float32"
+        pressure_dtype (str): Floating point type of the pressure Poisson right hand side and solve (None: dtype);
+                              "float64" with dtype="float32" accumulates the pressure in double precision
     """
 
     '''
 
     def __init__(self, Lx: float, Ly: float, h: float, dt: float, T: float,
              rho: float, nu: float, lid_velocity: callable,
-             verbose: bool = True):
+             verbose: bool = True, pressure_solver = "jacobi",
+             pressure_tol: float = None, pressure_max_iter: int = None,
+             multigrid_cycle: str = "V", pressure_norm: str = "l2",
+             pressure_warm_start: bool = True, pressure_cache_dir: str = None,
+             save_every: int = 1, save_interval: float = None, backend: str = "numpy",
+             adaptive_dt: bool = False, cfl: float = 0.5, steady_tol: float = None,
+             divergence_tol: float = None, steady_window: int = 10,
+             time_integrator: str = "euler", checkpoint_every: int = None,
+             checkpoint_path: str = None, result_cache_dir: str = None,
+             result_cache_max_bytes: int = None, workers: int = None,
+             dtype: str = "float64", pressure_dtype: str = None):
 
         self.Lx = Lx
         self.Ly = Ly
@@ -31,6 +72,29 @@ class SimulConfig:
         self.nu = nu
         self.lid_velocity = lid_velocity  
         self.verbose = verbose
+        self.pressure_solver = pressure_solver
+        self.pressure_tol = pressure_tol
+        self.pressure_max_iter = pressure_max_iter
+        self.multigrid_cycle = multigrid_cycle
+        self.pressure_norm = pressure_norm
+        self.pressure_warm_start = pressure_warm_start
+        self.pressure_cache_dir = pressure_cache_dir
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.backend = backend
+        self.adaptive_dt = adaptive_dt
+        self.cfl = cfl
+        self.steady_tol = steady_tol
+        self.divergence_tol = divergence_tol
+        self.steady_window = steady_window
+        self.time_integrator = time_integrator
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_path = checkpoint_path
+        self.result_cache_dir = result_cache_dir
+        self.result_cache_max_bytes = result_cache_max_bytes
+        self.workers = workers
+        self.dtype = dtype
+        self.pressure_dtype = pressure_dtype
         self.nt = int(T/dt)
         self.nx = int(Lx/h)
         self.ny = int(Ly/h)
@@ -38,17 +102,22 @@ class SimulConfig:
             self.print_config()
 
     def print_config(self):
+        dt_mode = " (maximal, adaptive)" if self.adaptive_dt else ""
         print(f"Simulation Configuration for 2D lid-driven cavity flow:\n"
             f"--------------------------------------------------------\n"
             f"  Domain size: Lx = {self.Lx}, Ly = {self.Ly}\n"
             f"  Grid spacing: h = {self.h}\n"
             f"  Grid nodes: nx = {self.nx + 1}, ny = {self.ny + 1}\n"
             f"  Final time: T = {self.T}\n"
-            f"  Time step: dt = {self.dt}\n"
+            f"  Time step: dt = {self.dt}{dt_mode}\n"
             f"  Number of time steps: nt = {self.nt}\n"
             f"  Simulation time: T = {self.nt * self.dt}\n"
             f"  Fluid density: rho = {self.rho}\n"
-            f"  Kinematic viscosity: nu = {self.nu}\n")
+            f"  Kinematic viscosity: nu = {self.nu}\n"
+            f"  Time integrator: {self.time_integrator}\n"
+            f"  Pressure solver: {self.pressure_solver}\n"
+            f"  Backend: {self.backend}\n"
+            f"  Precision: {self.dtype} (pressure {self.pressure_dtype or self.dtype})\n")
 
     
     def validate_SimulConfig(self) -> None:
@@ -74,5 +143,45 @@ class SimulConfig:
             if np.array(self.lid_velocity).ndim != 1:
                 raise ValueError("lid_velocity must be 1D if passed as an array-like object.")
 
+        if isinstance(self.pressure_solver, str) and self.pressure_solver not in PRESSURE_SOLVERS:
+            raise ValueError(f"Pressure solver must be one of {list(PRESSURE_SOLVERS)}.")
+        if self.pressure_tol is not None and self.pressure_tol <= 0:
+            raise ValueError("Pressure solver tolerance pressure_tol must be strictly positive.")
+        if self.pressure_max_iter is not None and self.pressure_max_iter < 1:
+            raise ValueError("Pressure solver iterations pressure_max_iter must be at least 1.")
+        if self.multigrid_cycle not in ("V", "W"):
+            raise ValueError("Multigrid cycle must be 'V' or 'W'.")
+        if self.pressure_norm not in ("l2", "linf"):
+            raise ValueError("Pressure residual norm must be 'l2' or 'linf'.")
+        if self.save_every < 1:
+            raise ValueError("Snapshot interval save_every must be at least 1.")
+        if self.save_interval is not None and self.save_interval <= 0:
+            raise ValueError("Snapshot interval save_interval must be strictly positive.")
+        if not 0 < self.cfl <= 1:
+            raise ValueError("CFL safety factor cfl must be in (0, 1].")
+        if self.steady_tol is not None and self.steady_tol <= 0:
+            raise ValueError("Steady-state threshold steady_tol must be strictly positive.")
+        if self.divergence_tol is not None and self.divergence_tol <= 0:
+            raise ValueError("Divergence threshold divergence_tol must be strictly positive.")
+        if self.steady_window < 1:
+            raise ValueError("Steady-state window steady_window must be at least 1.")
+        if self.time_integrator not in ("euler", "imex"):
+            raise ValueError("Time integrator must be 'euler' or 'imex'.")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend must be one of {list(BACKENDS)}.")
+        if self.checkpoint_every is not None:
+            if self.checkpoint_every < 1:
+                raise ValueError("Checkpoint interval checkpoint_every must be at least 1.")
+            if self.checkpoint_path is None:
+                raise ValueError("checkpoint_every requires a checkpoint_path.")
+        if self.workers is not None and self.workers < 1:
+            raise ValueError("Number of worker processes workers must be at least 1.")
+        if self.result_cache_max_bytes is not None and self.result_cache_max_bytes <= 0:
+            raise ValueError("Result cache size result_cache_max_bytes must be strictly positive.")
+        if self.dtype not in DTYPES:
+            raise ValueError(f"Floating point type dtype must be one of {list(DTYPES)}.")
+        if self.pressure_dtype is not None and self.pressure_dtype not in DTYPES:
+            raise ValueError(f"Floating point type pressure_dtype must be one of {list(DTYPES)}.")
+
 
 
@@ -1,28 +1,211 @@
+from collections import OrderedDict
+
 import numpy as np
 import lid_cavity.diff_operators as diff
 from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.PoissonSolvers import SpectralSolver, solve_dirichlet_helmholtz
+
+
+class SnapshotSeries:
+    """
+    Read-only sequence of the snapshots of one field, which are only loaded when they are accessed.
+
+    Indexing with an integer returns a single snapshot of shape `frame_shape`, indexing with a
+    slice or an index array returns the stacked snapshots. np.asarray loads the whole series.
+
+    Attributes:
+    -----------
+        load (callable): load(k) returns snapshot k for 0 <= k < n.
+        n (int): Number of snapshots.
+        frame_shape (tuple): Shape of a single snapshot.
+        dtype (np.dtype): Data type of the snapshots.
+    """
+
+    def __init__(self, load, n, frame_shape, dtype):
+        self.load = load
+        self.n = n
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def shape(self):
+        return (self.n,) + self.frame_shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            first, rest = index[0], index[1:]
+            if isinstance(first, (int, np.integer)):
+                return self[first][rest]
+            return self[first][(slice(None),) + rest]
+        if isinstance(index, (int, np.integer)):
+            if index < -self.n or index >= self.n:
+                raise IndexError(f"Snapshot index {index} out of range for {self.n} snapshots.")
+            return self.load(int(index) % self.n)
+        indices = np.arange(self.n)[index]
+        return np.stack([self.load(k) for k in indices]) if len(indices) else np.empty((0,) + self.frame_shape, self.dtype)
+
+    def __iter__(self):
+        for k in range(self.n):
+            yield self.load(k)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self[:], dtype=dtype)
+
 
 class SimulResult:
     """
     Container class for storing and accessing the results of a 2D incompressible flow simulation.
 
+    All fields hold the same snapshots: entry k of every field belongs to time step steps[k] at
+    physical time times[k]. The fields are either arrays or SnapshotSeries which load the snapshots lazily.
+
+    Only u, v and pressure are produced by the solver. curl, speed, divergence, kinetic_energy and
+    stream_function are derived from u and v on demand, and the most recently computed frames are
+    kept in a cache of at most cache_size entries.
+
     Attributes:
     -----------
-    u : np.ndarray
-        Horizontal velocity component array of shape (nt+1, nx+1, ny+1).
-    v : np.ndarray
-        Vertical velocity component array of shape (nt+1, nx+1, ny+1).
-    pressure : np.ndarray
-        Pressure field array of shape (nt, nx+1, ny+1).
-    curl : np.ndarray
-        Vorticity (scalar curl) field array, shape (nt, nx+1, ny+1)
-    speed : np.ndarray
-        Magnitude of velocity field: speed = sqrt(u² + v²) at each point, shape (nt+1, nx+1, ny+1) 
+    u : np.ndarray or SnapshotSeries
+        Horizontal velocity component, shape (n_snapshots, ny+1, nx+1).
+    v : np.ndarray or SnapshotSeries
+        Vertical velocity component, shape (n_snapshots, ny+1, nx+1).
+    pressure : np.ndarray or SnapshotSeries
+        Pressure field which produced the velocity of the snapshot, shape (n_snapshots, ny+1, nx+1).
+        Computed on demand from u and v (see compute_pressure) if the solver does not produce it.
+    curl : SnapshotSeries
+        Vorticity (scalar curl) field, shape (n_snapshots, ny+1, nx+1)
+    speed : SnapshotSeries
+        Magnitude of velocity field: speed = sqrt(u² + v²) at each point, shape (n_snapshots, ny+1, nx+1)
+    divergence : SnapshotSeries
+        Discrete divergence of the velocity field, shape (n_snapshots, ny+1, nx+1)
+    kinetic_energy : SnapshotSeries
+        Kinetic energy per unit density 1/2 ∫ (u² + v²) dx dy of each snapshot, shape (n_snapshots,)
+        ((n_snapshots, n_members) for an ensemble run)
+    stream_function : SnapshotSeries
+        Stream function psi with laplace(psi) = -curl and psi = 0 on the walls, shape (n_snapshots, ny+1, nx+1)
+    times : np.ndarray
+        Physical time of each snapshot, shape (n_snapshots,)
+    steps : np.ndarray
+        Time step index of each snapshot, shape (n_snapshots,)
+    pressure_iterations : np.ndarray
+        Number of pressure solver iterations in each time step, shape (nt,)
+    pressure_residuals : np.ndarray
+        Final relative residual of the pressure solver in each time step, shape (nt,)
+    time_steps : np.ndarray
+        Size dt of each time step, shape (nt,)
+    steady_state : bool
+        Whether the run was stopped early because a steady state was detected
+    metadata : dict
+        Configuration and grid of the run if the result was opened from a result store
+    path : str
+        Directory of the result store the result was opened from (None for results in memory)
+    h : float
+        Grid spacing, needed for the derived fields
+    rho : float
+        Fluid density, needed for the pressure computed on demand
     """
 
-    def __init__(self, u, v, pressure, curl, speed):
+    cache_size = 32
+
+    def __init__(self, u, v, pressure=None, curl=None, speed=None, pressure_iterations=None, pressure_residuals=None, times=None, steps=None, metadata=None, h=None, time_steps=None, steady_state=False, rho=1.0):
         self.u = u
         self.v = v
-        self.pressure = pressure
-        self.curl = curl
-        self.speed = speed
+        self.h = h
+        self.rho = rho
+        self._cache = OrderedDict()
+
+        frame_shape = np.shape(u[0])
+        self.pressure = self._derived_series("pressure", frame_shape) if pressure is None else pressure
+        self.curl = self._derived_series("curl", frame_shape) if curl is None else curl
+        self.speed = self._derived_series("speed", frame_shape) if speed is None else speed
+        self.divergence = self._derived_series("divergence", frame_shape)
+        self.kinetic_energy = self._derived_series("kinetic_energy", frame_shape[:-2])
+        self.stream_function = self._derived_series("stream_function", frame_shape)
+
+        self.pressure_iterations = pressure_iterations
+        self.pressure_residuals = pressure_residuals
+        self.time_steps = time_steps
+        self.steady_state = steady_state
+        self.steps = np.arange(len(u)) if steps is None else steps
+        self.times = times
+        self.metadata = metadata
+        self.path = None
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open a result store written by ResultStore.DirectorySink without loading the snapshots.
+        """
+        from lid_cavity.ResultStore import open_result
+        return open_result(path)
+
+    def __len__(self):
+        return len(self.u)
+
+    def _derived_series(self, name, frame_shape):
+        return SnapshotSeries(lambda k: self._derived(name, k), len(self.u), frame_shape, np.result_type(self.u.dtype, np.float32))
+
+    def _derived(self, name, k):
+        key = (name, k)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        value = getattr(self, f"compute_{name}")(np.asarray(self.u[k]), np.asarray(self.v[k]))
+        value.setflags(write=False)
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def compute_curl(self, u, v):
+        return diff.curl((u, v), self.h)
+
+    def compute_speed(self, u, v):
+        return np.sqrt(u**2 + v**2)
+
+    def compute_divergence(self, u, v):
+        return diff.divergence((u, v), self.h)
+
+    def compute_kinetic_energy(self, u, v):
+        # Integral over the grid only, leading batch axes (ensemble members) are kept
+        return np.asarray(0.5 * np.sum(u**2 + v**2, axis=(-2, -1)) * self.h**2)
+
+    def compute_stream_function(self, u, v):
+        return solve_dirichlet_helmholtz(-self.compute_curl(u, v), self.h)
+
+    def compute_pressure(self, u, v):
+        # Pressure Poisson equation of the velocity field, laplace(p) = -rho (u_x² + 2 u_y v_x + v_y²),
+        # with the pressure boundary conditions of the projection method
+        h = self.h
+        u_x, u_y = diff.central_difference_x(u, h), diff.central_difference_y(u, h)
+        v_x, v_y = diff.central_difference_x(v, h), diff.central_difference_y(v, h)
+        rhs = -self.rho * (u_x**2 + 2 * u_y * v_x + v_y**2)
+        ny, nx = np.shape(u)[-2] - 1, np.shape(u)[-1] - 1
+        return SpectralSolver(nx, ny, h).solve(rhs)
+
+    def member(self, i):
+        """
+        Result of member i of an ensemble run (LidDrivenEnsemble), whose snapshots hold all members.
+        The solver history (pressure iterations, time steps, ...) is shared by all members.
+        """
+        def member_series(series):
+            return SnapshotSeries(lambda k: np.asarray(series[k])[i], len(series), np.shape(series[0])[1:], series.dtype)
+
+        return SimulResult(member_series(self.u), member_series(self.v), member_series(self.pressure),
+                           pressure_iterations=self.pressure_iterations, pressure_residuals=self.pressure_residuals,
+                           times=self.times, steps=self.steps, metadata=self.metadata, h=self.h,
+                           time_steps=self.time_steps, steady_state=self.steady_state, rho=self.rho)
+
+    def frame_index(self, frame_time):
+        """
+        Index of the snapshot closest to the physical time frame_time.
+        """
+        return int(np.argmin(np.abs(np.asarray(self.times) - frame_time)))
@@ -0,0 +1,114 @@
+import json
+import time
+
+import numpy as np
+
+import lid_cavity.diff_operators as diff
+
+
+class NullTelemetry:
+    """
+    Telemetry which records nothing, used when the instrumentation is disabled. Its methods are
+    empty, so the solver loop only pays for a few method calls per step.
+    """
+
+    enabled = False
+
+    def start_step(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def end_step(self, sim, n, dt):
+        pass
+
+    def close(self):
+        pass
+
+
+class Telemetry(NullTelemetry):
+    """
+    Per-phase wall times and diagnostics of every time step of LidDrivenCavity.run.
+
+    The phases of a step are timed by lap(phase), which charges the time since the previous lap to
+    the phase: "intermediate" (derivatives and intermediate velocities, computed in one fused
+    kernel), "boundary_conditions", "poisson_rhs", "pressure_solve", "correction" and
+    "diagnostics" (the derived quantities of the record below, only computed with telemetry).
+
+    Every `every`-th step a record is emitted with the step index, time, time step, phase times,
+    pressure iterations and residual, maximal CFL number dt*(|u| + |v|)/h, divergence norm (root
+    mean square over the interior) and kinetic energy (a list with one value per member for an
+    ensemble). Records are passed to the callback and
+    written as JSON lines to log_path.
+
+    Attributes:
+    -----------
+        callback (callable): callback(record) for every record (None: no callback).
+        log_path (str): File of the JSON lines log (None: no log).
+        every (int): Emit a record every `every` steps.
+        totals (dict): Total wall time of every phase over the run.
+        records (list): All records, if keep_records is set.
+    """
+
+    enabled = True
+
+    def __init__(self, callback=None, log_path=None, every=1, keep_records=False):
+        self.callback = callback
+        self.log_path = log_path
+        self.every = every
+        self.keep_records = keep_records
+        self.totals = {}
+        self.records = []
+        self.phases = {}
+        self._log = None
+        self._last = None
+
+    def start_step(self):
+        self.phases = {}
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def end_step(self, sim, n, dt):
+        emit = n % self.every == 0
+        if emit:
+            u, v, h = sim.u, sim.v, sim.h
+            cfl = dt * (np.max(np.abs(u)) + np.max(np.abs(v))) / h
+            divergence = diff.divergence((u, v), h, work=sim.work)
+            divergence_norm = np.sqrt(np.mean(divergence[..., 1:-1, 1:-1]**2))
+            kinetic_energy = 0.5 * np.sum(u**2 + v**2, axis=(-2, -1)) * h**2
+            self.lap("diagnostics")
+
+        for phase, seconds in self.phases.items():
+            self.totals[phase] = self.totals.get(phase, 0.0) + seconds
+
+        if emit:
+            record = dict(step = n, t = float(sim.t), dt = float(dt), phases = dict(self.phases),
+                          pressure_iterations = int(sim.pressure_iterations[-1]),
+                          pressure_residual = float(sim.pressure_residuals[-1]),
+                          cfl = float(cfl), divergence = float(divergence_norm), kinetic_energy = kinetic_energy.tolist())
+            if self.keep_records:
+                self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+            if self.log_path is not None:
+                if self._log is None:
+                    self._log = open(self.log_path, "a")
+                self._log.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def summary(self):
+        """
+        Total wall time and share of every phase over the run.
+        """
+        total = sum(self.totals.values())
+        return {phase: dict(seconds = seconds, share = seconds / total if total > 0 else 0.0)
+                for phase, seconds in sorted(self.totals.items(), key=lambda item: -item[1])}
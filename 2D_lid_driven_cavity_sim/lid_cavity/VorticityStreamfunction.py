@@ -0,0 +1,170 @@
+import warnings
+
+import numpy as np
+
+from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity, StepState
+from lid_cavity.PoissonSolvers import solve_dirichlet_helmholtz
+
+
+class VorticityStreamfunctionCavity(LidDrivenCavity):
+    """
+    Lid-driven cavity solved in the vorticity-streamfunction formulation, an alternative engine to
+    the projection method of LidDrivenCavity with the same inputs and SimulResult output.
+
+    The working state is the vorticity w = dv/dx - du/dy. Every time step
+
+        1. advances the interior vorticity by an explicit Euler step of the transport equation
+           dw/dt + u*dw/dx + v*dw/dy = nu*laplace(w),
+        2. solves laplace(psi) = -w with psi = 0 on the walls (discrete sine transforms),
+        3. recovers the velocities u = dpsi/dy, v = -dpsi/dx on the interior and sets the wall velocities,
+        4. sets the wall vorticity from the no-slip condition by Thom's formula, e.g. on the lid
+           w = -2 psi_(ny-1) / h² - 2 U / h.
+
+    Compared with the projection method one scalar transport equation replaces the two momentum
+    equations and a direct solve replaces the pressure Poisson equation, and the velocity is
+    divergence free by construction. The pressure is not needed for the time stepping; the sink
+    only receives u and v and SimulResult.pressure computes the pressure on demand from the
+    pressure Poisson equation of the velocity field.
+
+    Only the explicit Euler integrator on the NumPy backend is supported; the domain decomposition
+    (config.workers) is ignored. The run loop, save schedule, adaptive time step, steady-state
+    detection, checkpoints and result cache are those of LidDrivenCavity.run. The per-step history
+    of the pressure solver records the stream function solve.
+
+    Attributes:
+    -----------
+        vorticity (np.ndarray): Vorticity of the working state, shape (ny+1, nx+1).
+        stream_function (np.ndarray): Stream function of the working state, shape (ny+1, nx+1).
+    """
+
+    engine = "vorticity"
+
+    def __init__(self, config: SimulConfig, grid: GridConstr):
+        if config.time_integrator != "euler":
+            raise ValueError("The vorticity-streamfunction engine only supports the explicit Euler time integrator.")
+        super().__init__(config, grid)
+        if config.backend != "numpy":
+            warnings.warn("The vorticity-streamfunction engine only has a NumPy backend.", RuntimeWarning)
+        if self.workers is not None:
+            warnings.warn("The domain decomposition does not support the vorticity-streamfunction engine, running serially.", RuntimeWarning)
+            self.workers = None
+
+        self.vorticity = np.zeros((self.ny + 1, self.nx + 1), dtype=self.dtype)
+        self.stream_function = np.zeros_like(self.vorticity)
+        self.vorticity_star = np.zeros_like(self.vorticity)
+
+    def wall_vorticity(self, w, psi, u_lid):
+        # Thom's formula: second order expansion of psi normal to the wall with psi = 0 and
+        # dpsi/dn given by the wall velocity (the corners belong to the lid and the side walls)
+        h = self.h
+        w[..., 0, :] = -2 * psi[..., 1, :] / h**2
+        w[..., :, 0] = -2 * psi[..., :, 1] / h**2
+        w[..., :, -1] = -2 * psi[..., :, -2] / h**2
+        w[..., -1, :] = -2 * psi[..., -2, :] / h**2 - 2 * u_lid / h
+        return w
+
+    def velocities(self, psi, u_lid):
+        # u = dpsi/dy, v = -dpsi/dx on the interior, wall velocities from the boundary conditions
+        h = self.h
+        np.subtract(psi[..., 2:, 1:-1], psi[..., 0:-2, 1:-1], out=self.u[..., 1:-1, 1:-1])
+        self.u[..., 1:-1, 1:-1] /= (2 * h)
+        np.subtract(psi[..., 1:-1, 0:-2], psi[..., 1:-1, 2:], out=self.v[..., 1:-1, 1:-1])
+        self.v[..., 1:-1, 1:-1] /= (2 * h)
+        return self.apply_boundary_conditions(self.u, self.v, u_lid)
+
+    def transport(self, w, u, v, dt, w_out):
+        """
+        Explicit Euler step of the vorticity transport equation on the interior,
+        w_out = w + dt*(-(u*dw/dx + v*dw/dy) + nu*laplace(w)), in one sweep as diff.advection_diffusion.
+        """
+        h = self.h
+        shape = w[..., 1:-1, 1:-1].shape
+        advection = self.work.get("advection", shape, w.dtype)
+        scratch = self.work.get("scratch", shape, w.dtype)
+        diffusion = self.work.get("diffusion", shape, w.dtype)
+
+        np.subtract(w[..., 1:-1, 2: ], w[..., 1:-1, 0:-2], out=advection)
+        advection /= (2 * h)
+        advection *= u[..., 1:-1, 1:-1]
+        np.subtract(w[..., 2: , 1:-1], w[..., 0:-2, 1:-1], out=scratch)
+        scratch /= (2 * h)
+        scratch *= v[..., 1:-1, 1:-1]
+        advection += scratch
+
+        np.add(w[..., 1:-1, 0:-2], w[..., 0:-2, 1:-1], out=diffusion)
+        np.multiply(w[..., 1:-1, 1:-1], 4, out=scratch)
+        diffusion -= scratch
+        diffusion += w[..., 1:-1, 2:  ]
+        diffusion += w[..., 2:  , 1:-1]
+        diffusion /= (h**2)
+        diffusion *= self.nu
+
+        diffusion -= advection
+        diffusion *= dt
+        np.add(w[..., 1:-1, 1:-1], diffusion, out=w_out[..., 1:-1, 1:-1])
+        return w_out
+
+    def step(self, n, dt):
+        """
+        Advance the working state w, psi, u, v from time self.t to self.t + dt (time step n).
+        """
+        self.dt = dt
+        telemetry = self.telemetry
+        telemetry.start_step()
+
+        if n == 0:
+            # Vorticity of the initial velocities, including the wall vorticity of the no-slip condition
+            self.initialise_vorticity()
+
+        w = self.transport(self.vorticity, self.u, self.v, dt, self.vorticity_star)
+        telemetry.lap("intermediate")
+
+        psi = solve_dirichlet_helmholtz(-w, self.h)
+        self.stream_function = psi
+        telemetry.lap("pressure_solve")
+        self.pressure_iterations.append(1)
+        self.pressure_residuals.append(0.0)
+        self.time_steps.append(dt)
+
+        self.t = self.t + dt if self.adaptive_dt else (n+1)*dt
+        u_lid = self.lid_velocity(self.t)
+        self.velocities(psi, u_lid)
+        telemetry.lap("correction")
+
+        self.wall_vorticity(w, psi, u_lid)
+        telemetry.lap("boundary_conditions")
+        self.vorticity, self.vorticity_star = w, self.vorticity
+
+    def initialise_vorticity(self):
+        h = self.h
+        u_lid = self.lid_velocity(self.t)
+        self.vorticity[...] = 0.0
+        inner = self.vorticity[..., 1:-1, 1:-1]
+        np.subtract(self.v[..., 1:-1, 2:], self.v[..., 1:-1, 0:-2], out=inner)
+        inner -= self.u[..., 2:, 1:-1]
+        inner += self.u[..., 0:-2, 1:-1]
+        inner /= (2 * h)
+        self.stream_function = solve_dirichlet_helmholtz(-self.vorticity, h)
+        self.wall_vorticity(self.vorticity, self.stream_function, u_lid)
+
+    def save_snapshot(self, sink, n):
+        # The pressure is not part of the state, SimulResult computes it on demand
+        sink.write(n, self.t, dict(u = self.u, v = self.v))
+
+    def step_state(self, n, dt):
+        if n == 0:
+            self.initialise_vorticity()
+        return StepState(n, self.t, dt, u = self.u, v = self.v, vorticity = self.vorticity, stream_function = self.stream_function)
+
+    def state_arrays(self):
+        arrays = super().state_arrays()
+        arrays.update(vorticity = self.vorticity, stream_function = self.stream_function)
+        return arrays
+
+    def restore_state_arrays(self, arrays):
+        super().restore_state_arrays(arrays)
+        self.vorticity = arrays["vorticity"]
+        self.stream_function = arrays["stream_function"]
+        self.vorticity_star = np.zeros_like(self.vorticity)
@@ -1,26 +1,122 @@
-import numpy as np 
+import numpy as np
 
-def central_difference_x(f, h):
-    df_dx = np.zeros_like(f)
-    df_dx[1:-1, 1:-1] = ( f[1:-1, 2: ] - f[1:-1, 0:-2]) / (2 * h)
+
+class Workspace:
+    """
+    Preallocated scratch arrays for the stencil operators, so that the time stepping loop
+    does not allocate new full-grid temporaries in every step.
+    """
+
+    def __init__(self):
+        self.arrays = {}
+
+    def get(self, name, shape, dtype=float):
+        array = self.arrays.get(name)
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = self.arrays[name] = np.empty(shape, dtype=dtype)
+        return array
+
+
+# All operators act on the last two axes, so a stack of fields with leading batch axes
+# (e.g. an ensemble of cavities) is processed in one call
+
+def _output(f, out):
+    # Zero-initialised result like np.zeros_like(f), or the given out array with zero boundary
+    if out is None:
+        return np.zeros_like(f)
+    out[..., 0, :] = 0.0
+    out[..., -1, :] = 0.0
+    out[..., :, 0] = 0.0
+    out[..., :, -1] = 0.0
+    return out
+
+def central_difference_x(f, h, out=None):
+    df_dx = _output(f, out)
+    np.subtract(f[..., 1:-1, 2: ], f[..., 1:-1, 0:-2], out=df_dx[..., 1:-1, 1:-1])
+    df_dx[..., 1:-1, 1:-1] /= (2 * h)
     return df_dx
 
-def central_difference_y(f, h):
-    df_dy = np.zeros_like(f)
-    df_dy[1:-1, 1:-1] = ( f[2: , 1:-1]  - f[0:-2, 1:-1]) / (2 * h)
+def central_difference_y(f, h, out=None):
+    df_dy = _output(f, out)
+    np.subtract(f[..., 2: , 1:-1], f[..., 0:-2, 1:-1], out=df_dy[..., 1:-1, 1:-1])
+    df_dy[..., 1:-1, 1:-1] /= (2 * h)
     return df_dy
 
-def laplace(f, h):
-    delta_f = np.zeros_like(f)
-    delta_f[1:-1, 1:-1] = ( f[1:-1, 0:-2] + f[0:-2, 1:-1] - 4*f[1:-1, 1:-1] + f[1:-1, 2:  ] + f[2:  , 1:-1]) / (h**2)
+def laplace(f, h, out=None):
+    delta_f = _output(f, out)
+    inner = delta_f[..., 1:-1, 1:-1]
+    np.add(f[..., 1:-1, 0:-2], f[..., 0:-2, 1:-1], out=inner)
+    inner -= 4*f[..., 1:-1, 1:-1]
+    inner += f[..., 1:-1, 2:  ]
+    inner += f[..., 2:  , 1:-1]
+    inner /= (h**2)
     return delta_f
 
-def divergence(F, h):
-    divF = central_difference_x(F[0], h) + central_difference_y(F[1], h)
+def divergence(F, h, out=None, work=None):
+    # F is a pair (u, v); passing a tuple instead of a stacked array avoids copying both components
+    work = Workspace() if work is None else work
+    divF = central_difference_x(F[0], h, out)
+    divF += central_difference_y(F[1], h, work.get("divergence", np.shape(F[1]), divF.dtype))
     return divF
 
-def curl(F, h):
-    curlF = central_difference_x(F[1], h) - central_difference_y(F[0], h)
-    return curlF 
+def curl(F, h, out=None, work=None):
+    work = Workspace() if work is None else work
+    curlF = central_difference_x(F[1], h, out)
+    curlF -= central_difference_y(F[0], h, work.get("curl", np.shape(F[0]), curlF.dtype))
+    return curlF
+
+def advection(u, v, f, h, out=None, work=None):
+    # Advection term u*df_dx + v*df_dy on the interior
+    work = Workspace() if work is None else work
+    adv = central_difference_x(f, h, out)
+    adv *= u
+    df_dy = central_difference_y(f, h, work.get("advection_dy", np.shape(f), adv.dtype))
+    df_dy *= v
+    adv += df_dy
+    return adv
+
+def advection_diffusion(u, v, nu, dt, h, u_out, v_out, work):
+    """
+    Explicit Euler step of the advection-diffusion part of the momentum equations,
+    f_out = f + dt*(-(u*df_dx + v*df_dy) + nu*laplace(f)) for f = u, v.
+
+    All derivatives are evaluated on the interior in a single sweep per component, reusing
+    interior-sized scratch arrays from the workspace instead of full-grid derivative fields.
+    The boundary values of u_out, v_out are copied from u, v. For a batch of fields nu may be an
+    array broadcasting against the interior, e.g. of shape (batch, 1, 1).
+    """
+    shape = u[..., 1:-1, 1:-1].shape
+    advection = work.get("advection", shape, u.dtype)
+    scratch = work.get("scratch", shape, u.dtype)
+    diffusion = work.get("diffusion", shape, u.dtype)
+    u_c = u[..., 1:-1, 1:-1]
+    v_c = v[..., 1:-1, 1:-1]
 
+    for f, f_out in ((u, u_out), (v, v_out)):
+        f_c = f[..., 1:-1, 1:-1]
+        # Advection u*df_dx + v*df_dy
+        np.subtract(f[..., 1:-1, 2: ], f[..., 1:-1, 0:-2], out=advection)
+        advection /= (2 * h)
+        advection *= u_c
+        np.subtract(f[..., 2: , 1:-1], f[..., 0:-2, 1:-1], out=scratch)
+        scratch /= (2 * h)
+        scratch *= v_c
+        advection += scratch
+        # Diffusion nu*laplace(f)
+        np.add(f[..., 1:-1, 0:-2], f[..., 0:-2, 1:-1], out=diffusion)
+        np.multiply(f_c, 4, out=scratch)
+        diffusion -= scratch
+        diffusion += f[..., 1:-1, 2:  ]
+        diffusion += f[..., 2:  , 1:-1]
+        diffusion /= (h**2)
+        diffusion *= nu
+        # Explicit Euler update
+        diffusion -= advection
+        diffusion *= dt
+        np.add(f_c, diffusion, out=f_out[..., 1:-1, 1:-1])
+        f_out[..., 0, :] = f[..., 0, :]
+        f_out[..., -1, :] = f[..., -1, :]
+        f_out[..., :, 0] = f[..., :, 0]
+        f_out[..., :, -1] = f[..., :, -1]
 
+    return u_out, v_out
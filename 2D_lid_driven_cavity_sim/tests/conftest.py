@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The package lives next to the tests and is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lid_cavity.SimulConfig import SimulConfig  # noqa: E402
+
+
+def constant_lid(t):
+    return 1.0
+
+
+@pytest.fixture
+def make_config():
+    """
+    Factory of small unit-cavity configurations: n x n cells, Re = 1/nu and a time step within
+    the explicit stability limit; further SimulConfig options are passed on.
+    """
+    def make(n=16, T=0.05, nu=0.1, dt=None, lid_velocity=constant_lid, **options):
+        h = 1.0 / n
+        if dt is None:
+            dt = min(0.2 * h**2 / nu, 0.25 * h)
+        return SimulConfig(1.0, 1.0, h, dt, T, 1.0, nu, lid_velocity, verbose=False, **options)
+    return make
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import lid_cavity.jit_kernels as jit
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+
+def run(config):
+    return LidDrivenCavity(config, GridConstr(config)).run()
+
+
+@pytest.mark.parametrize("pressure_solver", ["jacobi", "multigrid"])
+def test_numba_backend_is_bitwise_identical_to_numpy(make_config, pressure_solver):
+    pytest.importorskip("numba")
+    numpy_result = run(make_config(n=24, pressure_solver=pressure_solver, backend="numpy"))
+    numba_result = run(make_config(n=24, pressure_solver=pressure_solver, backend="numba"))
+    for name in ("u", "v", "pressure"):
+        assert np.array_equal(np.asarray(getattr(numba_result, name)), np.asarray(getattr(numpy_result, name)))
+    assert np.array_equal(numba_result.pressure_iterations, numpy_result.pressure_iterations)
+
+
+def test_numba_backend_falls_back_to_numpy_without_numba(make_config, monkeypatch):
+    monkeypatch.setattr(jit, "NUMBA_AVAILABLE", False)
+    config = make_config(backend="numba")
+    with pytest.warns(RuntimeWarning):
+        sim = LidDrivenCavity(config, GridConstr(config))
+    assert sim.backend == "numpy"
@@ -0,0 +1,52 @@
+import copy
+import json
+
+import pytest
+
+from lid_cavity.Benchmarks import compare, main, run_benchmarks
+
+
+@pytest.fixture(scope="module")
+def report():
+    return run_benchmarks(sizes=(16,), solvers=("jacobi", "spectral"), repeat=1, steps=2)
+
+
+def test_report_covers_every_benchmark(report):
+    benchmarks = [(result["benchmark"], result["options"].get("pressure_solver")) for result in report["results"]]
+    assert any(name.startswith("stencil.") for name, _ in benchmarks)
+    for solver in ("jacobi", "spectral"):
+        assert ("pressure_solve", solver) in benchmarks
+        assert ("step", solver) in benchmarks
+    for result in report["results"]:
+        assert result["seconds"] > 0
+        assert result["cells_per_second"] == pytest.approx(result["n"]**2 / result["seconds"])
+    json.dumps(report)
+
+
+def test_compare_reports_only_slowdowns_above_the_threshold(report):
+    baseline = copy.deepcopy(report)
+    assert compare(report, baseline) == []
+    slow = baseline["results"][0]
+    slow["seconds"] /= 2
+    regressions = compare(report, baseline, threshold=1.5)
+    assert [(benchmark, n) for benchmark, n, *_ in regressions] == [(slow["benchmark"], slow["n"])]
+    assert regressions[0][-1] == pytest.approx(2.0)
+    # Benchmarks missing from the baseline are not compared
+    baseline["results"] = baseline["results"][1:]
+    assert compare(report, baseline, threshold=1.5) == []
+
+
+def test_command_line_writes_the_report_and_fails_on_a_regression(tmp_path, capsys):
+    output = tmp_path / "report.json"
+    arguments = ["--sizes", "16", "--solvers", "spectral", "--repeat", "1", "--steps", "1", "--output", str(output)]
+    main(arguments)
+    with open(output) as f:
+        baseline = json.load(f)
+    for result in baseline["results"]:
+        result["seconds"] /= 100
+    with open(tmp_path / "baseline.json", "w") as f:
+        json.dump(baseline, f)
+    with pytest.raises(SystemExit) as exit_info:
+        main(arguments + ["--baseline", str(tmp_path / "baseline.json")])
+    assert exit_info.value.code == 1
+    assert "REGRESSION" in capsys.readouterr().out
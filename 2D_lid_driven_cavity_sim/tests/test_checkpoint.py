@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.ResultStore import DirectorySink
+
+
+def run(config, **kwargs):
+    return LidDrivenCavity(config, GridConstr(config)).run(**kwargs)
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_at(n):
+    def callback(state):
+        if state.n == n:
+            raise Interrupted
+    return callback
+
+
+@pytest.mark.parametrize("options", [dict(), dict(time_integrator="imex", adaptive_dt=True, steady_tol=1e-8)])
+def test_resumed_run_is_bitwise_identical(make_config, tmp_path, options):
+    dt = 0.0025
+    path = str(tmp_path / "run.npz")
+    config = make_config(dt=dt, T=40 * dt, save_every=3, checkpoint_every=10, checkpoint_path=path, **options)
+    full = run(config)
+    # Interrupted after step 25, resumed from the checkpoint of step 20
+    with pytest.raises(Interrupted):
+        run(config, sink=DirectorySink(str(tmp_path / "store")), callback=interrupt_at(25))
+    resumed = run(config, resume_from=path, sink=DirectorySink(str(tmp_path / "store")))
+
+    assert np.array_equal(resumed.steps, full.steps)
+    for name in ("u", "v", "pressure"):
+        assert np.array_equal(np.asarray(getattr(resumed, name)), np.asarray(getattr(full, name)))
+    for name in ("pressure_iterations", "pressure_residuals", "time_steps"):
+        assert np.array_equal(getattr(resumed, name), getattr(full, name))
+
+
+def test_checkpoint_of_another_configuration_is_rejected(make_config, tmp_path):
+    path = str(tmp_path / "run.npz")
+    run(make_config(checkpoint_every=2, checkpoint_path=path))
+    with pytest.raises(ValueError, match="different configuration"):
+        run(make_config(nu=0.05), resume_from=path)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from lid_cavity.ConvergenceMonitor import ConvergenceMonitor
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+
+def test_run_stops_early_at_the_steady_state(make_config):
+    config = make_config(T=5.0, steady_tol=1e-3, steady_window=5)
+    result = LidDrivenCavity(config, GridConstr(config)).run()
+    assert result.steady_state
+    assert result.steps[-1] < config.nt
+    assert len(result.pressure_iterations) == result.steps[-1]
+    assert result.times[-1] < config.T
+
+    # Without a threshold the same run goes on to the final time
+    full_config = make_config(T=result.times[-1] + 0.2)
+    full = LidDrivenCavity(full_config, GridConstr(full_config)).run()
+    assert not full.steady_state
+    change = np.max(np.abs(full.u[-1] - result.u[-1])) / np.max(np.abs(full.u[-1]))
+    assert change < 1e-3
+
+
+def test_monitor_needs_a_window_of_steady_steps():
+    monitor = ConvergenceMonitor(1e-6, 0.1, window=3)
+    field = np.ones((5, 5))
+    steady = [monitor.update(field, field, field, 0.01) for _ in range(4)]
+    assert steady == [False, False, False, True]
+    monitor.update(2 * field, field, field, 0.01)
+    assert monitor.count == 0
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import lid_cavity.diff_operators as diff
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+
+def naive_intermediate(u, v, nu, dt, h):
+    du_dx, du_dy = diff.central_difference_x(u, h), diff.central_difference_y(u, h)
+    dv_dx, dv_dy = diff.central_difference_x(v, h), diff.central_difference_y(v, h)
+    u_star = u + dt * (-(u * du_dx + v * du_dy) + nu * diff.laplace(u, h))
+    v_star = v + dt * (-(u * dv_dx + v * dv_dy) + nu * diff.laplace(v, h))
+    return u_star, v_star
+
+
+@pytest.fixture
+def fields():
+    rng = np.random.default_rng(1)
+    return rng.standard_normal((17, 17)), rng.standard_normal((17, 17))
+
+
+def test_out_arguments_match_the_allocating_operators(fields):
+    u, v = fields
+    h = 0.1
+    for operator in (diff.central_difference_x, diff.central_difference_y, diff.laplace):
+        out = np.full_like(u, np.nan)
+        assert operator(u, h, out=out) is out
+        np.testing.assert_array_equal(out, operator(u, h))
+    out = np.empty_like(u)
+    np.testing.assert_array_equal(diff.divergence((u, v), h, out=out), diff.divergence((u, v), h))
+
+
+def test_fused_kernel_matches_the_naive_intermediate_velocities(make_config, fields):
+    u, v = fields
+    config = make_config(n=16)
+    sim = LidDrivenCavity(config, GridConstr(config))
+    expected = naive_intermediate(u, v, config.nu, config.dt, config.h)
+    fused = sim.one_step_intermediate(u, v)
+    for f, f_fused, f_expected in zip((u, v), fused, expected):
+        np.testing.assert_allclose(f_fused[1:-1, 1:-1], f_expected[1:-1, 1:-1], rtol=1e-13, atol=1e-13)
+        np.testing.assert_array_equal(f_fused[0], f[0])
+
+    derivatives = (diff.central_difference_x(u, config.h), diff.central_difference_y(u, config.h),
+                   diff.central_difference_x(v, config.h), diff.central_difference_y(v, config.h),
+                   diff.laplace(u, config.h), diff.laplace(v, config.h))
+    for f_given, f_expected in zip(sim.one_step_intermediate(u, v, *derivatives), expected):
+        np.testing.assert_array_equal(f_given, f_expected)
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(config):
+    return LidDrivenCavity(config, GridConstr(config)).run()
+
+
+def test_decomposed_run_is_bitwise_identical_to_the_serial_run(make_config):
+    serial = run(make_config(n=24, pressure_max_iter=50))
+    decomposed = run(make_config(n=24, pressure_max_iter=50, workers=2))
+    for name in ("u", "v", "pressure"):
+        assert np.array_equal(np.asarray(getattr(decomposed, name)), np.asarray(getattr(serial, name)))
+    assert np.array_equal(decomposed.pressure_iterations, serial.pressure_iterations)
+
+
+def test_other_pressure_solvers_warn_and_solve_serially(make_config):
+    serial = run(make_config(n=24, pressure_solver="spectral"))
+    with pytest.warns(RuntimeWarning, match="only parallelises the Jacobi pressure solver"):
+        decomposed = run(make_config(n=24, pressure_solver="spectral", workers=2))
+    assert np.array_equal(decomposed.u[-1], serial.u[-1])
+
+
+def test_workers_after_a_numba_run_exit_cleanly():
+    pytest.importorskip("numba")
+    # A fork of a process running the Numba threads used to hang at interpreter exit, so the
+    # scenario runs in a fresh interpreter with a timeout
+    script = textwrap.dedent("""
+        from lid_cavity.GridConstr import GridConstr
+        from lid_cavity.LidDrivenCavity import LidDrivenCavity
+        from lid_cavity.ParameterSweep import ConstantLid
+        from lid_cavity.SimulConfig import SimulConfig
+
+        for options in (dict(backend="numba"), dict(workers=2)):
+            config = SimulConfig(1.0, 1.0, 1 / 16, 1e-3, 0.01, 1.0, 0.1, ConstantLid(1.0), verbose=False, **options)
+            LidDrivenCavity(config, GridConstr(config)).run()
+        print("done")
+    """)
+    finished = subprocess.run([sys.executable, "-c", script], cwd=PACKAGE_DIR, capture_output=True, text=True, timeout=120)
+    assert finished.returncode == 0, finished.stderr
+    assert finished.stdout.strip() == "done"
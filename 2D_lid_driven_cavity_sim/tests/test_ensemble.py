@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.LidDrivenEnsemble import LidDrivenEnsemble
+from lid_cavity.ParameterSweep import ConstantLid
+
+
+def test_ensemble_members_match_individual_runs(make_config):
+    nus = [0.1, 0.05, 0.08]
+    lids = [ConstantLid(1.0), ConstantLid(0.5), ConstantLid(-1.0)]
+    config = make_config(nu=max(nus), pressure_solver="spectral", save_every=5)
+    result = LidDrivenEnsemble(config, GridConstr(config), nu=nus, lid_velocity=lids).run()
+    assert result.u.shape[1] == 3
+    for i, (nu, lid) in enumerate(zip(nus, lids)):
+        single_config = make_config(nu=nu, dt=config.dt, lid_velocity=lid, pressure_solver="spectral", save_every=5)
+        single = LidDrivenCavity(single_config, GridConstr(single_config)).run()
+        member = result.member(i)
+        assert np.array_equal(member.steps, single.steps)
+        for name in ("u", "v", "pressure"):
+            np.testing.assert_array_equal(np.asarray(getattr(member, name)), np.asarray(getattr(single, name)))
+
+
+def test_checkpoint_of_an_ensemble_only_resumes_the_same_members(make_config, tmp_path):
+    path = str(tmp_path / "ensemble.npz")
+    config = make_config(checkpoint_every=5, checkpoint_path=path)
+    LidDrivenEnsemble(config, GridConstr(config), nu=[0.1, 0.05]).run()
+    with pytest.raises(ValueError, match="different configuration"):
+        LidDrivenEnsemble(config, GridConstr(config), nu=[0.1, 0.06]).run(resume_from=path)
+    LidDrivenEnsemble(config, GridConstr(config), nu=[0.1, 0.05]).run(resume_from=path)
@@ -0,0 +1,49 @@
+import os
+
+import matplotlib
+import pytest
+
+from lid_cavity.AnimationConfig import AnimationConfig
+from lid_cavity.FrameRenderer import FrameRenderer
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.ParameterSweep import ConstantLid
+from lid_cavity.ResultStore import DirectorySink
+
+
+@pytest.fixture
+def stored_run(make_config, tmp_path):
+    config = make_config(n=8, dt=0.002, T=0.04, save_every=2, lid_velocity=ConstantLid(1.0))
+    grid = GridConstr(config)
+    store_path = str(tmp_path / "run")
+    LidDrivenCavity(config, grid).run(sink=DirectorySink(store_path))
+    return config, grid, store_path
+
+
+def test_frame_skip_is_converted_to_snapshots(make_config):
+    config = make_config(dt=0.001, T=0.1, save_every=5)
+    assert AnimationConfig(config, GridConstr(config), "out", frame_skip=20).snapshot_skip == 4
+    assert AnimationConfig(config, GridConstr(config), "out", frame_skip=2).snapshot_skip == 1
+    config = make_config(dt=0.001, T=0.1, save_interval=0.01)
+    assert AnimationConfig(config, GridConstr(config), "out", frame_skip=30).snapshot_skip == 3
+
+
+def test_parallel_frames_equal_serial_frames(stored_run, tmp_path):
+    config, grid, store_path = stored_run
+    frames = {}
+    for workers in (1, 2):
+        animation = AnimationConfig(config, grid, str(tmp_path / f"frames_{workers}"), frame_skip=4)
+        frame_dir = FrameRenderer(store_path, animation, max_workers=workers, dpi=30).render(filename=None)
+        frames[workers] = sorted(os.listdir(frame_dir))
+        # Snapshots 0, 2, 4, ... of the 11 snapshots (steps 0, 2, ..., 20)
+        assert len(frames[workers]) == 6
+        frames[workers] = [open(os.path.join(frame_dir, name), "rb").read() for name in frames[workers]]
+    assert frames[1] == frames[2]
+
+
+def test_missing_ffmpeg_is_reported(stored_run, tmp_path, monkeypatch):
+    config, grid, store_path = stored_run
+    monkeypatch.setitem(matplotlib.rcParams, "animation.ffmpeg_path", "no-such-ffmpeg")
+    animation = AnimationConfig(config, grid, str(tmp_path / "video"), frame_skip=4)
+    with pytest.raises(RuntimeError, match="ffmpeg was not found"):
+        FrameRenderer(store_path, animation, max_workers=1).render(filename="video.mp4")
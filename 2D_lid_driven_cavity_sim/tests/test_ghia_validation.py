@@ -0,0 +1,37 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from lid_cavity.GhiaValidation import GhiaValidation, pareto_front
+
+
+def test_pareto_front_keeps_the_fastest_case_of_every_error_level():
+    rows = [dict(name="slow_accurate", runtime=4.0, error=0.01),
+            dict(name="fast_coarse", runtime=1.0, error=0.1),
+            dict(name="beaten", runtime=2.0, error=0.2),
+            dict(name="middle", runtime=2.5, error=0.05),
+            dict(name="diverged", runtime=0.5, error=np.inf)]
+    assert [row["name"] for row in pareto_front(rows)] == ["fast_coarse", "middle", "slow_accurate"]
+
+
+def test_validation_ladder_writes_the_summary_and_the_plot(tmp_path):
+    settings = {"projection": dict(pressure_solver="spectral"), "vorticity": dict(engine="vorticity")}
+    validation = GhiaValidation(str(tmp_path), reynolds=(100,), sizes=(16, 32), settings=settings, steady_tol=1e-3)
+    rows = validation.run()
+
+    assert [(row["n"], row["setting"]) for row in rows] == [(16, "projection"), (16, "vorticity"), (32, "projection"), (32, "vorticity")]
+    for setting in settings:
+        coarse, fine = (row["error"] for row in rows if row["setting"] == setting)
+        assert fine < coarse < 0.2
+    assert json.loads((tmp_path / "summary.json").read_text()) == json.loads(json.dumps(rows))
+    with open(tmp_path / "summary.csv", newline="") as f:
+        assert len(list(csv.DictReader(f))) == len(rows)
+    assert (tmp_path / "pareto.png").stat().st_size > 0
+    assert GhiaValidation.cheapest(rows, 100, 0.0) is None
+
+
+def test_unknown_reynolds_number(tmp_path):
+    with pytest.raises(ValueError, match="No reference data"):
+        GhiaValidation(str(tmp_path), reynolds=(100, 250))
@@ -0,0 +1,23 @@
+import numpy as np
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+
+def run(config, **kwargs):
+    return LidDrivenCavity(config, GridConstr(config)).run(**kwargs)
+
+
+def test_pressure_warm_start_saves_iterations_without_changing_the_flow(make_config):
+    options = dict(pressure_tol=1e-6, pressure_max_iter=5000)
+    cold = run(make_config(T=0.3, **options, pressure_warm_start=False))
+    warm = run(make_config(T=0.3, **options, pressure_warm_start=True))
+    assert warm.pressure_iterations[1:].sum() < 0.75 * cold.pressure_iterations[1:].sum()
+    assert np.max(np.abs(warm.u[-1] - cold.u[-1])) < 1e-5
+
+
+def test_direct_pressure_solvers_give_the_same_flow(make_config):
+    spectral = run(make_config(pressure_solver="spectral"))
+    sparse = run(make_config(pressure_solver="sparse"))
+    np.testing.assert_allclose(spectral.u[-1], sparse.u[-1], atol=1e-12)
+    np.testing.assert_allclose(spectral.pressure[-1], sparse.pressure[-1], atol=1e-9)
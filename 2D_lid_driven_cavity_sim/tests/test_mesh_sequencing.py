@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.MeshSequencing import MeshSequencing, refine
+
+
+def test_refine_keeps_the_coarse_nodes_and_bilinear_fields():
+    y, x = np.meshgrid(np.linspace(0, 1, 5), np.linspace(0, 2, 9), indexing="ij")
+    fine_y, fine_x = np.meshgrid(np.linspace(0, 1, 9), np.linspace(0, 2, 17), indexing="ij")
+    f = 1 + 2 * x - 3 * y + 0.5 * x * y
+    fine = refine(f)
+    assert fine.shape == (9, 17)
+    assert np.array_equal(fine[::2, ::2], f)
+    np.testing.assert_allclose(fine, 1 + 2 * fine_x - 3 * fine_y + 0.5 * fine_x * fine_y, atol=1e-14)
+    assert refine(np.stack([f, 2 * f])).shape == (2, 9, 17)
+
+
+def test_sequenced_steady_state_matches_the_direct_run_with_fewer_fine_steps(make_config):
+    config = make_config(n=32, T=10.0, pressure_solver="spectral", steady_tol=1e-3, save_every=10**6)
+    direct = LidDrivenCavity(config, GridConstr(config)).run()
+    sequencing = MeshSequencing(config, n_levels=3)
+    sequenced = sequencing.run()
+
+    assert [(level["nx"], level["steady_state"]) for level in sequencing.levels] == [(8, True), (16, True), (32, True)]
+    assert sequencing.levels[-1]["steps"] < len(direct.time_steps)
+    assert np.max(np.abs(sequenced.u[-1] - direct.u[-1])) < 0.01
+
+
+def test_invalid_sequencing(make_config):
+    with pytest.raises(ValueError, match="steady_tol"):
+        MeshSequencing(make_config(n=16))
+    with pytest.raises(ValueError, match="cannot be coarsened"):
+        MeshSequencing(make_config(n=18, steady_tol=1e-3), n_levels=3)
@@ -0,0 +1,62 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.ParameterSweep import ConstantLid, ParameterSweep, RampedLid
+from lid_cavity.ResultStore import open_result
+from lid_cavity.SimulConfig import SimulConfig
+
+
+def test_sweep_runs_every_combination_like_a_single_run(tmp_path):
+    base = dict(Lx=1.0, Ly=1.0, h=1 / 12, dt=0.002, T=0.02, rho=1.0, pressure_solver="spectral", save_every=5)
+    values = dict(nu=[0.1, 0.05], lid_velocity=[1.0, RampedLid(1.0, 0.01)])
+    rows = ParameterSweep(base, values, str(tmp_path), max_workers=2).run()
+
+    assert [row["name"] for row in rows] == [f"case_{i:04d}" for i in range(4)]
+    assert [(row["nu"], row["lid_velocity"]) for row in rows] == [
+        (0.1, "ConstantLid(U=1.0)"), (0.1, "RampedLid(U=1.0, t_ramp=0.01)"),
+        (0.05, "ConstantLid(U=1.0)"), (0.05, "RampedLid(U=1.0, t_ramp=0.01)")]
+    with open(tmp_path / "summary.json") as f:
+        assert json.load(f) == rows
+    with open(tmp_path / "summary.csv") as f:
+        assert len(list(csv.DictReader(f))) == 4
+
+    params = dict(base, nu=0.05)
+    config = SimulConfig(lid_velocity=ConstantLid(1.0), verbose=False, **params)
+    direct = LidDrivenCavity(config, GridConstr(config)).run()
+    stored = open_result(str(tmp_path / "case_0002"))
+    assert np.array_equal(stored.u[-1], direct.u[-1])
+    assert np.isclose(rows[2]["final_kinetic_energy"], float(direct.kinetic_energy[-1]))
+    profiles = np.load(tmp_path / "case_0002" / "centreline_profiles.npz")
+    assert np.array_equal(profiles["u"], rows[2]["u_centreline"])
+
+
+def test_sweep_after_a_numba_run_exits_cleanly():
+    pytest.importorskip("numba")
+    # Worker processes forked from a process running the Numba threads used to hang at exit
+    script = textwrap.dedent("""
+        import tempfile
+
+        from lid_cavity.GridConstr import GridConstr
+        from lid_cavity.LidDrivenCavity import LidDrivenCavity
+        from lid_cavity.ParameterSweep import ConstantLid, ParameterSweep
+        from lid_cavity.SimulConfig import SimulConfig
+
+        config = SimulConfig(1.0, 1.0, 1 / 16, 1e-3, 0.01, 1.0, 0.1, ConstantLid(1.0), verbose=False, backend="numba")
+        LidDrivenCavity(config, GridConstr(config)).run()
+        base = dict(Lx=1.0, Ly=1.0, h=1 / 8, dt=0.002, T=0.01, rho=1.0, nu=0.1)
+        with tempfile.TemporaryDirectory() as out_dir:
+            ParameterSweep(base, dict(lid_velocity=[1.0, 2.0]), out_dir, max_workers=2).run()
+    """)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    finished = subprocess.run([sys.executable, "-c", script], cwd=package_dir, capture_output=True, text=True, timeout=120)
+    assert finished.returncode == 0, finished.stderr
+    assert "case_0001" in finished.stdout
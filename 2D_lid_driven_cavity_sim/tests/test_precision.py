@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from lid_cavity.Benchmarks import precision_check
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+
+@pytest.mark.parametrize("pressure_solver", ["spectral", "jacobi"])
+def test_single_precision_halves_the_state_and_stays_close_to_float64(pressure_solver):
+    double, single, mixed = precision_check(n=32, T=0.5, pressure_solver=pressure_solver)
+    assert double["deviation"] == dict(u=0.0, v=0.0, pressure=0.0)
+    assert single["state_bytes"] == double["state_bytes"] // 2
+    assert single["state_bytes"] < mixed["state_bytes"] < double["state_bytes"]
+    for result in (single, mixed):
+        assert max(result["deviation"].values()) < 1e-5
+
+
+def test_single_precision_snapshots(make_config):
+    config = make_config(dtype="float32", pressure_dtype="float64")
+    sim = LidDrivenCavity(config, GridConstr(config))
+    result = sim.run()
+    assert sim.u.dtype == np.float32 and sim.pressure.dtype == np.float64
+    assert result.u[-1].dtype == np.float32 and result.pressure[-1].dtype == np.float32
+    assert result.curl[-1].dtype == np.float32
@@ -0,0 +1,158 @@
+import warnings
+
+import numpy as np
+import pytest
+
+import lid_cavity.PoissonSolvers as poisson
+from lid_cavity.Benchmarks import factor_cache_check
+from lid_cavity.PoissonSolvers import (JacobiSolver, MultigridSolver, SparseDirectSolver, SpectralSolver,
+                                      apply_pressure_boundary_conditions, residual, solve_dirichlet_helmholtz)
+
+
+def rough_rhs(n, seed=0):
+    x = np.linspace(0, 1, n + 1)
+    X, Y = np.meshgrid(x, x)
+    noise = np.random.default_rng(seed).standard_normal((n + 1, n + 1))
+    return np.sin(3 * np.pi * X) * np.cos(2 * np.pi * Y) + 0.1 * noise
+
+
+@pytest.mark.parametrize("cycle, max_cycles", [("V", 16), ("W", 8)])
+def test_multigrid_cycle_count_is_bounded_across_grids(cycle, max_cycles):
+    counts = []
+    for n in (32, 64, 128, 256):
+        solver = MultigridSolver(n, n, 1 / n, cycle=cycle)
+        solver.solve(rough_rhs(n))
+        assert solver.last_residual <= solver.tol
+        counts.append(solver.last_iterations)
+    assert max(counts) <= max_cycles
+    assert counts[-1] - counts[0] <= 5
+
+
+def test_multigrid_solution_satisfies_the_discrete_equation():
+    n = 64
+    rhs = rough_rhs(n)
+    p = MultigridSolver(n, n, 1 / n, tol=1e-10).solve(rhs)
+    r = residual(p, rhs, 1 / n)
+    assert np.linalg.norm(r[1:-1, 1:-1]) <= 1e-9 * np.linalg.norm(rhs[1:-1, 1:-1])
+    np.testing.assert_array_equal(p, apply_pressure_boundary_conditions(p.copy()))
+
+
+def test_multigrid_coarsest_level_is_solved_directly_for_odd_coarse_grids():
+    # 254 = 2 * 127: a single coarsening, the 127 x 127 coarse grid is too large for the dense inverse
+    n = 254
+    solver = MultigridSolver(n, n, 1 / n)
+    assert [level[0] for level in solver.levels] == [254, 127]
+    solver.solve(rough_rhs(n))
+    assert solver.last_residual <= solver.tol
+
+
+def test_multigrid_batch_matches_single_solves():
+    n = 32
+    rhs = np.stack([rough_rhs(n, seed) for seed in range(3)])
+    solver = MultigridSolver(n, n, 1 / n, tol=1e-10)
+    batch = solver.solve(rhs)
+    for k in range(3):
+        np.testing.assert_allclose(batch[k], MultigridSolver(n, n, 1 / n, tol=1e-10).solve(rhs[k]), atol=1e-9)
+
+
+def test_multigrid_warns_without_convergence():
+    n = 32
+    with pytest.warns(RuntimeWarning, match="did not converge"):
+        MultigridSolver(n, n, 1 / n, max_iter=1).solve(rough_rhs(n))
+
+
+def test_multigrid_converges_much_faster_than_jacobi():
+    n = 32
+    rhs = rough_rhs(n)
+    multigrid = MultigridSolver(n, n, 1 / n, tol=1e-4)
+    jacobi = JacobiSolver(n, n, 1 / n, tol=1e-4, max_iter=100)
+    multigrid.solve(rhs)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        jacobi.solve(rhs)
+    assert multigrid.last_residual <= 1e-4 < jacobi.last_residual
+
+
+@pytest.mark.parametrize("norm", ["l2", "linf"])
+def test_jacobi_stops_at_the_residual_tolerance(norm):
+    n = 16
+    rhs = rough_rhs(n)
+    solver = JacobiSolver(n, n, 1 / n, tol=1e-3, max_iter=10000, norm=norm)
+    p = solver.solve(rhs)
+    assert 0 < solver.last_iterations < 10000
+    assert solver.last_residual <= 1e-3
+    np.testing.assert_allclose(solver.relative_residual(p, rhs), solver.last_residual, rtol=1e-6)
+
+
+def test_jacobi_without_tolerance_does_max_iter_sweeps():
+    n = 16
+    solver = JacobiSolver(n, n, 1 / n, max_iter=37)
+    solver.solve(rough_rhs(n))
+    assert solver.last_iterations == 37
+
+
+@pytest.mark.parametrize("solver_class", [JacobiSolver, MultigridSolver])
+def test_warm_start_from_the_solution_needs_no_iterations(solver_class):
+    n = 16
+    rhs = rough_rhs(n)
+    solver = solver_class(n, n, 1 / n, tol=1e-4, max_iter=20000)
+    p = solver.solve(rhs)
+    solver.solve(rhs, p0=p)
+
+
+@pytest.mark.parametrize("nx, ny", [(16, 16), (24, 12), (12, 20)])
+def test_spectral_solve_is_exact_and_agrees_with_the_sparse_solve(nx, ny):
+    h = 1 / 16
+    rhs = np.random.default_rng(1).standard_normal((ny + 1, nx + 1))
+    spectral = SpectralSolver(nx, ny, h)
+    p = spectral.solve(rhs)
+    assert spectral.last_residual < 1e-12
+    np.testing.assert_allclose(p, SparseDirectSolver(nx, ny, h).solve(rhs), atol=1e-12 * np.max(np.abs(p)))
+
+
+def test_spectral_batch_matches_single_solves():
+    n = 16
+    rhs = np.random.default_rng(2).standard_normal((3, n + 1, n + 1))
+    batch = SpectralSolver(n, n, 1 / n).solve(rhs)
+    for k in range(3):
+        np.testing.assert_allclose(batch[k], SpectralSolver(n, n, 1 / n).solve(rhs[k]), atol=1e-13)
+
+
+def test_dirichlet_helmholtz_solve():
+    n, h, shift = 16, 1 / 16, 3.0
+    rhs = np.random.default_rng(3).standard_normal((n + 1, n + 1))
+    f = solve_dirichlet_helmholtz(rhs, h, shift=shift)
+    assert np.all(f[0] == 0) and np.all(f[-1] == 0) and np.all(f[:, 0] == 0) and np.all(f[:, -1] == 0)
+    laplace = (f[1:-1, 0:-2] + f[0:-2, 1:-1] - 4 * f[1:-1, 1:-1] + f[1:-1, 2:] + f[2:, 1:-1]) / h**2
+    np.testing.assert_allclose(laplace - shift * f[1:-1, 1:-1], rhs[1:-1, 1:-1], atol=1e-10)
+
+
+def fresh_sparse_solver(n, cache_dir):
+    # Bypass the in-process cache of factorisations
+    poisson._factor_cache.pop(poisson.pressure_factor_key(n, n, 1 / n), None)
+    return SparseDirectSolver(n, n, 1 / n, cache_dir=cache_dir)
+
+
+def test_sparse_factorisation_disk_cache_is_reused(tmp_path):
+    pytest.importorskip("numba")
+    n = 40
+    rhs = np.random.default_rng(4).standard_normal((2, n + 1, n + 1))
+    fresh = fresh_sparse_solver(n, str(tmp_path))
+    assert len(list(tmp_path.glob("pressure_lu_40x40_*.npz"))) == 1
+    loaded = fresh_sparse_solver(n, str(tmp_path))
+    assert isinstance(loaded.factor, poisson.TriangularFactors)
+    np.testing.assert_allclose(loaded.solve(rhs), fresh.solve(rhs), atol=1e-12)
+    np.testing.assert_allclose(loaded.solve(rhs[0]), fresh.solve(rhs[0]), atol=1e-12)
+
+
+def test_loading_cached_factors_is_faster_than_factorising():
+    pytest.importorskip("numba")
+    result = factor_cache_check(128, repeat=1)
+    assert result["load"] < result["factorise"]
+
+
+def test_sparse_factorisation_disk_cache_needs_numba(tmp_path, monkeypatch):
+    monkeypatch.setattr(poisson.jit, "NUMBA_AVAILABLE", False)
+    with pytest.warns(RuntimeWarning, match="needs Numba"):
+        fresh_sparse_solver(24, str(tmp_path))
+    assert not list(tmp_path.iterdir())
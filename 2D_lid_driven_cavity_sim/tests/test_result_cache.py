@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from lid_cavity.Checkpoint import config_hash
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.PoissonSolvers import JacobiSolver, MultigridSolver
+from lid_cavity.ResultCache import ResultCache, result_key
+
+
+def test_identical_runs_hit_the_cache_and_changed_runs_miss(make_config, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    config = make_config(result_cache_dir=cache_dir)
+    first = LidDrivenCavity(config, GridConstr(config)).run()
+    assert first.path is not None and first.path.startswith(cache_dir)
+
+    # Settings which do not change the result share the entry
+    again_config = make_config(result_cache_dir=cache_dir, result_cache_max_bytes=10**9,
+                               checkpoint_path=str(tmp_path / "c.npz"))
+    again = LidDrivenCavity(again_config, GridConstr(again_config)).run()
+    assert again.path == first.path
+    assert np.array_equal(again.u[-1], first.u[-1])
+
+    changed_config = make_config(result_cache_dir=cache_dir, nu=0.09)
+    changed = LidDrivenCavity(changed_config, GridConstr(changed_config)).run()
+    assert changed.path != first.path
+    assert len(ResultCache(cache_dir).entries()) == 2
+
+
+def test_differently_configured_solver_instances_have_different_keys(make_config):
+    config = make_config()
+    grid = GridConstr(config)
+
+    def keys(solver):
+        solver_config = make_config(pressure_solver=solver)
+        return result_key(solver_config, grid), config_hash(solver_config)
+
+    assert keys(JacobiSolver(grid.nx, grid.ny, grid.h, tol=1e-6)) == keys(JacobiSolver(grid.nx, grid.ny, grid.h, tol=1e-6))
+    distinct = [keys(JacobiSolver(grid.nx, grid.ny, grid.h, tol=1e-6)),
+                keys(JacobiSolver(grid.nx, grid.ny, grid.h, tol=1e-8)),
+                keys(JacobiSolver(grid.nx, grid.ny, grid.h, tol=1e-6, max_iter=500)),
+                keys(JacobiSolver(grid.nx, grid.ny, grid.h, tol=1e-6, norm="linf")),
+                keys(MultigridSolver(grid.nx, grid.ny, grid.h, cycle="V")),
+                keys(MultigridSolver(grid.nx, grid.ny, grid.h, cycle="W"))]
+    assert len({key for pair in distinct for key in pair}) == 2 * len(distinct)
+
+
+def test_failed_run_leaves_no_cache_entry(make_config, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    config = make_config(result_cache_dir=cache_dir)
+    sim = LidDrivenCavity(config, GridConstr(config))
+
+    def fail(n, dt):
+        raise RuntimeError("solver failure")
+
+    sim.step = fail
+    with pytest.raises(RuntimeError, match="solver failure"):
+        sim.run()
+    assert os.listdir(cache_dir) == []
+
+
+def test_least_recently_used_entries_are_evicted(make_config, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    paths = []
+    for nu in (0.1, 0.09, 0.08):
+        config = make_config(nu=nu, result_cache_dir=cache_dir)
+        paths.append(LidDrivenCavity(config, GridConstr(config)).run().path)
+    cache = ResultCache(cache_dir, max_entries=2)
+    os.utime(paths[0], (0, 0))
+    cache.evict()
+    assert sorted(key for key, _, _ in cache.entries()) == sorted(os.path.basename(path) for path in paths[1:])
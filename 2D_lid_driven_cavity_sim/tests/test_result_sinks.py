@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.ResultSink import MemorySink, SaveSchedule
+from lid_cavity.ResultStore import DirectorySink, open_result
+
+
+def test_memory_sink_keeps_the_scheduled_snapshots_and_the_last_step(make_config):
+    config = make_config(save_every=4)
+    result = LidDrivenCavity(config, GridConstr(config)).run()
+    expected = list(range(0, config.nt + 1, 4))
+    if expected[-1] != config.nt:
+        expected.append(config.nt)
+    assert list(result.steps) == expected
+    assert result.u.shape == (len(expected), config.ny + 1, config.nx + 1)
+    np.testing.assert_allclose(result.times, result.steps * config.dt)
+
+
+def test_save_interval_overrides_save_every(make_config):
+    config = make_config(T=0.05, dt=0.001, save_interval=0.01)
+    result = LidDrivenCavity(config, GridConstr(config)).run()
+    assert len(result.times) == 6
+    np.testing.assert_allclose(result.times, np.arange(6) * 0.01, atol=1e-9)
+
+
+def test_save_schedule():
+    schedule = SaveSchedule(save_every=3)
+    assert [n for n in range(10) if schedule.due(n, 0.1 * n)] == [0, 3, 6, 9]
+
+
+def test_repeated_run_starts_from_the_initial_fields(make_config):
+    config = make_config()
+    sim = LidDrivenCavity(config, GridConstr(config))
+    first = sim.run()
+    second = sim.run(sink=MemorySink())
+    for name in ("u", "v", "pressure"):
+        assert np.array_equal(getattr(first, name)[-1], getattr(second, name)[-1])
+    assert np.array_equal(first.pressure_iterations, second.pressure_iterations)
+
+
+def test_directory_sink_round_trip(make_config, tmp_path):
+    config = make_config(save_every=3)
+    sim = LidDrivenCavity(config, GridConstr(config))
+    memory = sim.run()
+    stored = sim.run(sink=DirectorySink(str(tmp_path / "run")))
+    reopened = open_result(str(tmp_path / "run"))
+    for result in (stored, reopened):
+        assert np.array_equal(result.steps, memory.steps)
+        for name in ("u", "v", "pressure"):
+            assert np.array_equal(np.asarray(getattr(result, name)), np.asarray(getattr(memory, name)))
+        assert np.array_equal(result.pressure_iterations, memory.pressure_iterations)
+        assert isinstance(result.u[0], np.memmap)
+
+
+def test_summary_scalars_stay_python_scalars(make_config, tmp_path):
+    config = make_config(steady_tol=1e-3, T=5.0)
+    result = LidDrivenCavity(config, GridConstr(config)).run(sink=DirectorySink(str(tmp_path / "run")))
+    assert result.steady_state is True
+    assert open_result(str(tmp_path / "run")).steady_state is True
+
+
+def test_compressed_float32_store(make_config, tmp_path):
+    config = make_config()
+    sim = LidDrivenCavity(config, GridConstr(config))
+    memory = sim.run()
+    stored = sim.run(sink=DirectorySink(str(tmp_path / "run"), dtype=np.float32, compress=True))
+    assert os.listdir(tmp_path / "run" / "u")[0].endswith(".npz")
+    assert stored.u[-1].dtype == np.float32
+    np.testing.assert_allclose(stored.u[-1], memory.u[-1], rtol=1e-6, atol=1e-7)
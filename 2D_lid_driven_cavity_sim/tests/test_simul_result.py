@@ -0,0 +1,46 @@
+import numpy as np
+
+import lid_cavity.diff_operators as diff
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.LidDrivenEnsemble import LidDrivenEnsemble
+from lid_cavity.SimulResult import SimulResult
+from lid_cavity.Telemetry import Telemetry
+
+
+def test_derived_fields_are_computed_from_the_velocities(make_config):
+    config = make_config()
+    result = LidDrivenCavity(config, GridConstr(config)).run()
+    u, v, h = result.u[-1], result.v[-1], config.h
+    np.testing.assert_array_equal(result.curl[-1], diff.curl((u, v), h))
+    np.testing.assert_array_equal(result.speed[-1], np.sqrt(u**2 + v**2))
+    np.testing.assert_array_equal(result.divergence[-1], diff.divergence((u, v), h))
+    assert result.kinetic_energy.shape == (len(result),)
+    assert np.isclose(result.kinetic_energy[-1], 0.5 * np.sum(u**2 + v**2) * h**2)
+    assert np.all(result.stream_function[-1][0] == 0)
+
+
+def test_derived_fields_are_cached_lazily():
+    rng = np.random.default_rng(0)
+    n = 2 * SimulResult.cache_size
+    result = SimulResult(rng.random((n, 9, 9)), rng.random((n, 9, 9)), h=0.125)
+    assert not result._cache
+    first = result.curl[0]
+    assert result.curl[0] is first
+    assert not first.flags.writeable
+    result.speed[:]
+    assert len(result._cache) == SimulResult.cache_size
+
+
+def test_ensemble_kinetic_energy_per_member(make_config):
+    config = make_config()
+    ensemble = LidDrivenEnsemble(config, GridConstr(config), nu=[0.1, 0.05],
+                                 lid_velocity=[lambda t: 1.0, lambda t: 0.5])
+    telemetry = Telemetry(keep_records=True)
+    result = ensemble.run(telemetry=telemetry)
+    assert result.kinetic_energy.shape == (len(result), 2)
+    for i in range(2):
+        member = result.member(i)
+        np.testing.assert_allclose(result.kinetic_energy[:, i], member.kinetic_energy[:])
+    np.testing.assert_allclose(telemetry.records[-1]["kinetic_energy"], result.kinetic_energy[-1])
+    assert result.kinetic_energy[-1, 0] > result.kinetic_energy[-1, 1]
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+
+def test_steps_yields_read_only_views_every_few_steps(make_config):
+    config = make_config()
+    sim = LidDrivenCavity(config, GridConstr(config))
+    states = []
+    for state in sim.steps(every=4):
+        assert not state.u.flags.writeable
+        with pytest.raises(ValueError):
+            state.u[0, 0] = 1.0
+        states.append((state.n, state.t, state.u.copy()))
+
+    indices = [n for n, _, _ in states]
+    assert indices == sorted(set(list(range(0, sim.nt + 1, 4)) + [sim.nt]))
+
+    reference = LidDrivenCavity(config, GridConstr(config)).run()
+    assert np.array_equal(states[-1][2], reference.u[-1])
+
+
+def test_sending_true_stops_the_generator_with_the_result(make_config):
+    config = make_config(T=0.5)
+    sim = LidDrivenCavity(config, GridConstr(config))
+    generator = sim.steps(every=5)
+    state = next(generator)
+    while state.n < 10:
+        state = generator.send(False)
+    with pytest.raises(StopIteration) as finished:
+        generator.send(True)
+
+    result = finished.value.value
+    assert result.times[-1] == pytest.approx(state.t)
+    assert result.steps[-1] == state.n
+    assert len(sim.time_steps) == 10 < sim.nt
+
+
+def test_callback_stops_the_run_and_bypasses_the_cache(make_config, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    config = make_config(result_cache_dir=cache_dir)
+    seen = []
+
+    def callback(state):
+        seen.append(state.n)
+        return state.n >= 6
+
+    sim = LidDrivenCavity(config, GridConstr(config))
+    result = sim.run(callback=callback, callback_every=3)
+    assert seen == [0, 3, 6]
+    assert len(sim.time_steps) == 6
+    assert result.path is None
+    assert not os.path.isdir(cache_dir) or os.listdir(cache_dir) == []
@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+from lid_cavity.Telemetry import Telemetry
+
+PHASES = {"intermediate", "boundary_conditions", "poisson_rhs", "pressure_solve", "correction", "diagnostics"}
+
+
+def test_telemetry_records_phases_and_diagnostics(make_config, tmp_path):
+    config = make_config()
+    log_path = tmp_path / "telemetry.jsonl"
+    received = []
+    telemetry = Telemetry(callback=received.append, log_path=str(log_path), every=2, keep_records=True)
+    result = LidDrivenCavity(config, GridConstr(config)).run(telemetry=telemetry)
+
+    assert [record["step"] for record in received] == list(range(2, config.nt + 1, 2))
+    assert telemetry.records == received
+    with open(log_path) as f:
+        assert [json.loads(line) for line in f] == received
+
+    last = received[-1]
+    assert set(last["phases"]) == PHASES
+    assert last["pressure_iterations"] == result.pressure_iterations[last["step"] - 1]
+    u, v = result.u[-1], result.v[-1]
+    assert last["kinetic_energy"] == pytest.approx(0.5 * np.sum(u**2 + v**2) * config.h**2)
+    assert last["cfl"] == pytest.approx(config.dt * (np.max(np.abs(u)) + np.max(np.abs(v))) / config.h)
+
+    summary = telemetry.summary()
+    assert set(summary) == PHASES
+    assert sum(phase["share"] for phase in summary.values()) == pytest.approx(1.0)
+
+
+def test_telemetry_does_not_change_the_result(make_config):
+    config = make_config()
+    plain = LidDrivenCavity(config, GridConstr(config)).run()
+    timed = LidDrivenCavity(config, GridConstr(config)).run(telemetry=Telemetry())
+    assert np.array_equal(timed.u[-1], plain.u[-1])
+    assert np.array_equal(timed.pressure[-1], plain.pressure[-1])
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.LidDrivenCavity import LidDrivenCavity
+
+
+def test_adaptive_time_step_respects_the_limits_and_hits_the_final_time(make_config):
+    nu, h = 0.1, 1 / 16
+    # A maximal time step far above the viscous limit is only used as a cap
+    config = make_config(nu=nu, dt=0.05, T=0.2, adaptive_dt=True, cfl=0.5, save_interval=0.05)
+    sim = LidDrivenCavity(config, GridConstr(config))
+    result = sim.run()
+    assert np.all(result.time_steps <= 0.5 * 0.5 * h**2 / nu * (1 + 1e-12))
+    assert np.isclose(np.sum(result.time_steps), config.T, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(result.times, [0.0, 0.05, 0.1, 0.15, 0.2], atol=1e-12)
+
+    # A repeated run starts with an empty solver history
+    again = sim.run()
+    assert np.array_equal(again.time_steps, result.time_steps)
+    assert np.array_equal(again.u[-1], result.u[-1])
+
+
+def test_fixed_time_step_above_the_viscous_limit_is_rejected(make_config):
+    config = make_config(nu=0.1, dt=0.03)
+    with pytest.raises(RuntimeError, match="Unstable"):
+        LidDrivenCavity(config, GridConstr(config))
+
+
+def test_imex_integrator_is_stable_beyond_the_viscous_limit(make_config):
+    nu, h = 0.1, 1 / 16
+    dt = 4 * 0.5 * h**2 / nu
+    T = 30 * dt
+    explicit = make_config(nu=nu, dt=dt / 20, T=T)
+    reference = LidDrivenCavity(explicit, GridConstr(explicit)).run().u[-1]
+
+    errors = []
+    for refinement in (1, 8):
+        config = make_config(nu=nu, dt=dt / refinement, T=T, time_integrator="imex")
+        u = LidDrivenCavity(config, GridConstr(config)).run().u[-1]
+        assert np.all(np.isfinite(u)) and np.max(np.abs(u)) <= 1.0 + 1e-12
+        errors.append(np.max(np.abs(u - reference)))
+    # Four times the explicit limit stays bounded, and the error shrinks with the time step
+    assert errors[0] < 0.2
+    assert errors[1] < 0.5 * errors[0]
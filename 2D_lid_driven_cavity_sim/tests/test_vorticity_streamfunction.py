@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from lid_cavity.GhiaValidation import ghia_error, time_step
+from lid_cavity.GridConstr import GridConstr
+from lid_cavity.ParameterSweep import ConstantLid
+from lid_cavity.SimulConfig import SimulConfig
+from lid_cavity.VorticityStreamfunction import VorticityStreamfunctionCavity
+
+
+def test_velocity_is_divergence_free_with_the_wall_conditions(make_config):
+    config = make_config(save_every=5)
+    result = VorticityStreamfunctionCavity(config, GridConstr(config)).run()
+    u, v = result.u[-1], result.v[-1]
+    assert np.max(np.abs(result.divergence[-1][1:-1, 1:-1])) < 1e-12
+    assert np.all(u[-1, 1:-1] == 1.0) and np.all(u[0] == 0.0) and np.all(u[:, 0] == 0.0) and np.all(u[:, -1] == 0.0)
+    assert np.all(v[0] == 0.0) and np.all(v[-1] == 0.0) and np.all(v[:, 0] == 0.0) and np.all(v[:, -1] == 0.0)
+    # The pressure is computed on demand from the velocity
+    assert result.pressure[-1].shape == u.shape and np.all(np.isfinite(result.pressure[-1]))
+
+
+def test_steady_state_converges_to_the_ghia_reference():
+    errors = []
+    for n in (16, 32):
+        nu = 0.01
+        config = SimulConfig(1.0, 1.0, 1 / n, time_step(n, nu), 40.0, 1.0, nu, ConstantLid(1.0), verbose=False,
+                             save_every=10**6, steady_tol=1e-4)
+        grid = GridConstr(config)
+        result = VorticityStreamfunctionCavity(config, grid).run()
+        assert result.steady_state
+        error = ghia_error(result, grid, 100)
+        errors.append(max(error["u_max"], error["v_max"]))
+    assert errors[1] < 0.02
+    assert errors[1] < 0.5 * errors[0]
+
+
+def test_unsupported_options(make_config):
+    with pytest.raises(ValueError, match="explicit Euler"):
+        config = make_config(time_integrator="imex")
+        VorticityStreamfunctionCavity(config, GridConstr(config))
+    config = make_config(workers=2)
+    with pytest.warns(RuntimeWarning, match="does not support the vorticity"):
+        sim = VorticityStreamfunctionCavity(config, GridConstr(config))
+    assert sim.workers is None